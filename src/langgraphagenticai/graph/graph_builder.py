@@ -1,5 +1,5 @@
 from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import tools_condition, ToolNode
+from langgraph.prebuilt import tools_condition
 from src.langgraphagenticai.state.state import State
 from src.langgraphagenticai.nodes.basic_chatbot_node import BasicChatbotNode
 from src.langgraphagenticai.nodes.chatbot_with_tool_node import ChatbotWithToolNode
@@ -54,8 +54,8 @@ class GraphBuilder:
         if not mcp_tools:
             raise ValueError("No MCP tools could be created from the configuration")
 
-        # Create tool node
-        tool_node = ToolNode(tools=mcp_tools)
+        # Create tool node (runs parallel tool calls concurrently)
+        tool_node = create_tool_node(tools=mcp_tools)
 
         # Create MCP chatbot node
         mcp_chatbot_node_obj = MCPChatbotNode(self.llm)
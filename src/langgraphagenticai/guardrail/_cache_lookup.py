@@ -0,0 +1,71 @@
+"""
+Semantic Cache Similarity Kernel
+Fused dot-product, normalization and best-match scan over the cache matrix
+
+Rows are scaled by precomputed reciprocal norms (0 for rows stored without an
+embedding), so a scan is one dot product and one multiply per row.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Rows upcast per block when the matrix is stored in half precision
+_BLOCK_ROWS = 4096
+
+
+def _top_sim_numpy(matrix, query, inv_norms, contexts, context):
+    """Vectorized fallback used without numba or for float16 matrices"""
+    if matrix.dtype == np.float32:
+        similarities = np.dot(matrix, query)
+    else:
+        # Only the half-precision matrix streams from memory; each block is
+        # widened in cache so the dot product still runs on float32 BLAS
+        similarities = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            block = matrix[start:start + _BLOCK_ROWS]
+            similarities[start:start + len(block)] = np.dot(block.astype(np.float32), query)
+    similarities *= inv_norms / (np.linalg.norm(query) + 1e-8)
+    similarities[(contexts != context) | (inv_norms == 0)] = -1.0
+    best = int(np.argmax(similarities))
+    return best, float(similarities[best])
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _top_sim_numba(matrix, query, inv_norms, contexts, context):
+        rows, dim = matrix.shape
+        query_norm = 0.0
+        for j in range(dim):
+            query_norm += query[j] * query[j]
+        inv_query_norm = 1.0 / (np.sqrt(query_norm) + 1e-8)
+
+        similarities = np.full(rows, -1.0, dtype=np.float32)
+        for i in numba.prange(rows):
+            # Rows from another context, or stored without an embedding, never match
+            if contexts[i] != context or inv_norms[i] == 0.0:
+                continue
+            dot = 0.0
+            for j in range(dim):
+                dot += matrix[i, j] * query[j]
+            similarities[i] = dot * inv_norms[i] * inv_query_norm
+
+        best = 0
+        for i in range(1, rows):
+            if similarities[i] > similarities[best]:
+                best = i
+        return best, similarities[best]
+
+else:
+    _top_sim_numba = None
+
+
+def top_sim(matrix, query, inv_norms, contexts, context):
+    """Return (row, cosine similarity) of the best row in the given context"""
+    if _top_sim_numba is not None and matrix.dtype == np.float32:
+        return _top_sim_numba(matrix, query, inv_norms, contexts, context)
+    return _top_sim_numpy(matrix, query, inv_norms, contexts, context)
@@ -2,14 +2,255 @@
 Guardrails Configuration and Management
 Handles safety and validation for LLM inputs and outputs
 """
+import functools
 import os
-from typing import Optional
+import re
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
 import streamlit as st
 from guardrails import Guard
 from guardrails.hub import ToxicLanguage, ProfanityFree, ReadingTime, SensitiveTopic
 from guardrails.hub import ValidLength
+from guardrails.validator_base import (
+    FailResult,
+    PassResult,
+    ValidationResult,
+    Validator,
+    register_validator,
+)
 from pydantic import BaseModel, Field
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+except ImportError:
+    torch = None
+
+
+TOXICITY_MODEL_NAME = "unitary/toxic-bert"
+# Per-sentence score at which user input is rejected as toxic
+INPUT_TOXICITY_THRESHOLD = 0.8
+
+
+_QUANTIZED_MODEL_ATTRS = ("_model", "_classifier", "model")
+
+
+def quantize_int8(model: Any) -> Any:
+    """
+    Apply PyTorch dynamic int8 quantization to a CPU classifier's Linear layers
+
+    Accepts a torch module or an object (pipeline, Detoxify, validator) holding
+    one; anything else, GPU models, or disabled quantization pass through as-is.
+    """
+    if torch is None or os.getenv("GUARDRAILS_QUANTIZE", "true").lower() != "true":
+        return model
+    if not any(engine in torch.backends.quantized.supported_engines for engine in ("x86", "fbgemm", "qnnpack")):
+        return model
+
+    try:
+        if isinstance(model, torch.nn.Module):
+            if next(model.parameters()).device.type != "cpu":
+                return model
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        for attr in _QUANTIZED_MODEL_ATTRS:
+            inner = getattr(model, attr, None)
+            if inner is not None and inner is not model:
+                quantized = quantize_int8(inner)
+                if quantized is not inner:
+                    setattr(model, attr, quantized)
+    except Exception:
+        # Quantization is an optimization; keep the FP32 model on any failure
+        pass
+    return model
+
+
+def _load_profanity_patterns() -> tuple:
+    """Load blocked terms (one per line) from PROFANITY_WORDLIST, if configured"""
+    path = os.getenv("PROFANITY_WORDLIST")
+    if not path:
+        return ()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            words = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError:
+        return ()
+    return tuple(rf"\b{re.escape(word)}\b" for word in words)
+
+
+def _compile_profanity_matcher(patterns: tuple) -> Callable[[str], bool]:
+    """Compile every blocked term into a single multi-pattern matcher"""
+    if hyperscan is not None:
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[p.encode("utf-8") for p in patterns],
+                ids=list(range(len(patterns))),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns),
+            )
+
+            def _on_match(*_args):
+                # Returning True stops the scan at the first hit
+                return True
+
+            def _matches(text: str) -> bool:
+                try:
+                    database.scan(text.encode("utf-8"), match_event_handler=_on_match)
+                except hyperscan.ScanTerminated:
+                    return True
+                return False
+
+            return _matches
+        except Exception:
+            pass
+
+    pattern = re.compile("|".join(patterns), re.IGNORECASE)
+    return lambda text: pattern.search(text) is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_toxicity_model() -> tuple:
+    # Raises on failure so lru_cache only keeps a successfully loaded model
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    tokenizer = AutoTokenizer.from_pretrained(TOXICITY_MODEL_NAME)
+    model = AutoModelForSequenceClassification.from_pretrained(TOXICITY_MODEL_NAME).to(device).eval()
+    return tokenizer, quantize_int8(model), device
+
+
+def load_toxicity_model():
+    """Load the multi-label toxicity classifier once (None if unavailable)"""
+    if torch is None:
+        return None
+    try:
+        return _load_toxicity_model()
+    except Exception:
+        return None
+
+
+def score_toxicity(texts: List[str], classifier: Optional[tuple] = None) -> np.ndarray:
+    """
+    Score texts with one padded forward pass of the toxicity classifier
+
+    Args:
+        texts: Texts to score
+        classifier: (tokenizer, model, device) from load_toxicity_model; loaded if omitted
+
+    Returns:
+        np.ndarray: (len(texts), n_labels) per-label probabilities
+    """
+    tokenizer, model, device = classifier or load_toxicity_model()
+    encoded = tokenizer(texts, padding=True, truncation=True, return_tensors="pt").to(device)
+    with torch.inference_mode(), torch.autocast(device_type=device, dtype=torch.float16, enabled=device == "cuda"):
+        # toxic-bert is multi-label, so each label gets an independent sigmoid score
+        return torch.sigmoid(model(**encoded).logits).float().cpu().numpy()
+
+
+# toxic-bert labels standing in for the checks the separate validators ran
+_FUSED_LABEL_GROUPS = {
+    "toxic language": ("toxic", "severe_toxic", "insult"),
+    "profanity": ("obscene",),
+    "threats or hate speech": ("threat", "identity_hate"),
+}
+
+
+@register_validator(name="langgraphagenticai/fused_safety", data_type="string")
+class FusedSafetyClassifier(Validator):
+    """Toxicity, profanity and threat/hate checks from a single encoder pass"""
+
+    def __init__(self, threshold: float = 0.8, on_fail: Optional[Callable] = None):
+        super().__init__(on_fail=on_fail, threshold=threshold)
+        loaded = load_toxicity_model()
+        if not loaded:
+            raise RuntimeError("Toxicity classifier is not available")
+        label2id = {label.lower(): index for label, index in loaded[1].config.label2id.items()}
+        self._threshold = threshold
+        self._groups = {
+            name: [label2id[label] for label in labels if label in label2id]
+            for name, labels in _FUSED_LABEL_GROUPS.items()
+        }
+
+    def validate(self, value: Any, metadata: Dict) -> ValidationResult:
+        scores = score_toxicity([str(value)])[0]
+        flagged = [
+            name for name, indices in self._groups.items()
+            if indices and scores[indices].max() >= self._threshold
+        ]
+        if flagged:
+            return FailResult(error_message=f"Value was flagged for {', '.join(flagged)}.")
+        return PassResult()
+
+
+def fused_classifier_enabled() -> bool:
+    return os.getenv("GUARDRAILS_FUSED_CLASSIFIER", "false").lower() == "true"
+
+
+@register_validator(name="langgraphagenticai/fast_profanity_free", data_type="string")
+class FastProfanityFree(Validator):
+    """Word-list profanity check compiled into one hyperscan/regex pass"""
+
+    def __init__(self, patterns: tuple, on_fail: Optional[Callable] = None):
+        super().__init__(on_fail=on_fail)
+        self._matches = _compile_profanity_matcher(patterns)
+
+    def validate(self, value: Any, metadata: Dict) -> ValidationResult:
+        if self._matches(str(value)):
+            return FailResult(error_message="Value contains profanity.")
+        return PassResult()
+
+
+@functools.lru_cache(maxsize=None)
+def _profanity_validator() -> Validator:
+    """Prefer the compiled word-list matcher; fall back to the hub model"""
+    patterns = _load_profanity_patterns()
+    if patterns:
+        return FastProfanityFree(patterns)
+    return ProfanityFree()
+
+
+def toxic_sentences_message(sentences: List[str]) -> str:
+    """Failure message shared by the toxicity validator and batched input screening"""
+    return "The following sentences were found to be toxic:\n\n" + "\n".join(sentences)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+", text) if sentence.strip()]
+
+
+@register_validator(name="langgraphagenticai/shared_toxic_language", data_type="string")
+class SharedToxicLanguage(Validator):
+    """ToxicLanguage equivalent scored by a toxicity classifier passed in at construction"""
+
+    def __init__(self, classifier: tuple, threshold: float = 0.5, validation_method: str = "sentence",
+                 on_fail: Optional[Callable] = None):
+        super().__init__(on_fail=on_fail, threshold=threshold, validation_method=validation_method)
+        self._classifier = classifier
+        self._threshold = threshold
+        self._validation_method = validation_method
+
+    def validate(self, value: Any, metadata: Dict) -> ValidationResult:
+        text = str(value)
+        chunks = (split_sentences(text) if self._validation_method == "sentence" else None) or [text]
+        scores = score_toxicity(chunks, self._classifier)
+        toxic = [chunk for chunk, row in zip(chunks, scores) if row.max() >= self._threshold]
+        if toxic:
+            return FailResult(error_message=toxic_sentences_message(toxic))
+        return PassResult()
+
+
+@functools.lru_cache(maxsize=None)
+def _toxic_language(threshold: float, validation_method: str) -> Validator:
+    """Toxicity validator backed by the shared classifier, so guards don't each load a model"""
+    classifier = load_toxicity_model()
+    if classifier:
+        return SharedToxicLanguage(classifier, threshold=threshold, validation_method=validation_method)
+    # No local classifier (torch/transformers missing): use the hub validator as-is
+    return quantize_int8(ToxicLanguage(threshold=threshold, validation_method=validation_method))
+
 
 class GuardrailsConfig:
     """Configuration for Guardrails AI safety measures"""
@@ -26,16 +267,19 @@ class GuardrailsConfig:
                 return
             
             # Input validation guard
-            self.guards["input_safety"] = self._create_input_safety_guard()
+            self.guards["input_safety"] = self._build_guard(self._create_input_safety_guard)
+            
+            # Input screening without the toxicity model (used by batched validation)
+            self.guards["input_screening"] = self._build_guard(self._create_input_screening_guard)
             
             # Output validation guard
-            self.guards["output_quality"] = self._create_output_quality_guard()
+            self.guards["output_quality"] = self._build_guard(self._create_output_quality_guard)
             
             # Content moderation guard
-            self.guards["content_moderation"] = self._create_content_moderation_guard()
+            self.guards["content_moderation"] = self._build_guard(self._create_content_moderation_guard)
             
             # Structured output guard
-            self.guards["structured_output"] = self._create_structured_output_guard()
+            self.guards["structured_output"] = self._build_guard(self._create_structured_output_guard)
             
         except Exception as e:
             # Fail silently - guardrails should not break the app
@@ -43,52 +287,81 @@ class GuardrailsConfig:
                 st.warning(f"⚠️ Guardrails initialization failed: {e}")
             self.enabled = False
     
-    def _create_input_safety_guard(self) -> Guard:
-        """Create guard for input safety validation"""
+    @staticmethod
+    def _build_guard(factory: Callable[[], Guard]) -> Optional[Guard]:
+        """Call a cached guard factory; failures raise past lru_cache, so they are retried next time"""
         try:
-            return Guard().use(
-                ToxicLanguage(threshold=0.8, validation_method="sentence"),
-                ProfanityFree(),
-                ValidLength(min=1, max=2000)
-            )
+            return factory()
         except Exception:
             return None
     
-    def _create_output_quality_guard(self) -> Guard:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_input_safety_guard() -> Guard:
+        """Create guard for input safety validation"""
+        if fused_classifier_enabled():
+            try:
+                return Guard().use(
+                    FusedSafetyClassifier(threshold=INPUT_TOXICITY_THRESHOLD),
+                    ValidLength(min=1, max=2000)
+                )
+            except Exception:
+                # Fall back to the separate hub validators
+                pass
+        return Guard().use(
+            _toxic_language(INPUT_TOXICITY_THRESHOLD, "sentence"),
+            _profanity_validator(),
+            ValidLength(min=1, max=2000)
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_input_screening_guard() -> Guard:
+        """Create input guard minus toxicity, which is scored separately in batches"""
+        return Guard().use(
+            _profanity_validator(),
+            ValidLength(min=1, max=2000)
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_output_quality_guard() -> Guard:
         """Create guard for output quality validation"""
-        try:
-            return Guard().use(
-                ValidLength(min=10, max=5000),
-                ReadingTime(reading_time_range=(1, 300))  # 1-300 seconds reading time
-            )
-        except Exception:
-            return None
+        return Guard().use(
+            ValidLength(min=10, max=5000),
+            ReadingTime(reading_time_range=(1, 300))  # 1-300 seconds reading time
+        )
     
-    def _create_content_moderation_guard(self) -> Guard:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_content_moderation_guard() -> Guard:
         """Create guard for content moderation"""
-        try:
-            sensitive_topics = [
-                "violence", "hate_speech", "harassment", 
-                "illegal_activities", "self_harm"
-            ]
-            return Guard().use(
-                SensitiveTopic(sensitive_topics=sensitive_topics, threshold=0.8),
-                ToxicLanguage(threshold=0.7, validation_method="full")
-            )
-        except Exception:
-            return None
+        sensitive_topics = [
+            "violence", "hate_speech", "harassment", 
+            "illegal_activities", "self_harm"
+        ]
+        sensitive_topic = quantize_int8(SensitiveTopic(sensitive_topics=sensitive_topics, threshold=0.8))
+        if fused_classifier_enabled():
+            try:
+                return Guard().use(sensitive_topic, FusedSafetyClassifier(threshold=0.7))
+            except Exception:
+                # Fall back to the separate hub validators
+                pass
+        return Guard().use(
+            sensitive_topic,
+            _toxic_language(0.7, "full")
+        )
     
-    def _create_structured_output_guard(self) -> Guard:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_structured_output_guard() -> Guard:
         """Create guard for structured output validation"""
-        try:
-            class ChatResponse(BaseModel):
-                content: str = Field(description="The main response content")
-                confidence: float = Field(ge=0.0, le=1.0, description="Confidence score")
-                safe: bool = Field(description="Whether the response is safe")
-            
-            return Guard.from_pydantic(ChatResponse)
-        except Exception:
-            return None
+        class ChatResponse(BaseModel):
+            content: str = Field(description="The main response content")
+            confidence: float = Field(ge=0.0, le=1.0, description="Confidence score")
+            safe: bool = Field(description="Whether the response is safe")
+        
+        return Guard.from_pydantic(ChatResponse)
     
     def get_guard(self, guard_type: str) -> Optional[Guard]:
         """Get a specific guard by type"""
@@ -2,23 +2,78 @@
 Guardrails LLM Wrapper
 Wraps LLM calls with input/output validation
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List, Optional
 from langchain_core.language_models.base import BaseLanguageModel
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk, HumanMessage
 from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables.config import get_config_list
 from .validation_service import validation_service
+from .response_cache import cache_namespace, get_response_cache, is_response_cache_enabled, split_prompt
 import streamlit as st
 
 
-class GuardrailsLLMWrapper(BaseLanguageModel):
+SAFE_INPUT_RESPONSE = "I cannot process this request due to safety guidelines. Please rephrase your question."
+
+# Shared pool for validating multiple generations of one call in parallel
+_VALIDATION_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="guardrails-validate")
+
+# Session-state key where validation warnings are buffered until the turn ends
+WARNINGS_KEY = "_guardrail_warnings"
+
+
+def _in_event_loop() -> bool:
+    """Whether the caller is already running inside an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def flush_guardrail_warnings():
+    """Render the guardrail warnings buffered during this turn"""
+    try:
+        for message in st.session_state.pop(WARNINGS_KEY, []):
+            st.warning(message)
+    except Exception:
+        pass
+
+
+class GuardrailsLLMWrapper(BaseChatModel):
     """
     Wrapper that adds Guardrails validation to any LangChain LLM
     """
     
-    def __init__(self, llm: BaseLanguageModel, usecase: str = "general"):
-        self.llm = llm
-        self.usecase = usecase
-        self.validation_service = validation_service
+    llm: Any
+    usecase: str = "general"
+    validation_service: Any = None
+    response_cache: Any = None
+    
+    def __init__(self, llm: BaseLanguageModel, usecase: str = "general", **kwargs: Any):
+        # Start from the wrapped model's callbacks so monitoring sees the same handlers
+        kwargs.setdefault("callbacks", getattr(llm, "callbacks", None))
+        super().__init__(
+            llm=llm,
+            usecase=usecase,
+            validation_service=validation_service,
+            response_cache=(
+                get_response_cache(usecase, cache_namespace(llm)) if is_response_cache_enabled() else None
+            ),
+            **kwargs,
+        )
+    
+    def _warn(self, message: str):
+        """Buffer a warning for the UI instead of rendering it mid-call"""
+        try:
+            st.session_state.setdefault(WARNINGS_KEY, []).append(message)
+        except Exception:
+            # No Streamlit session (e.g. worker thread or plain script)
+            pass
     
     def _generate(
         self,
@@ -43,36 +98,42 @@ class GuardrailsLLMWrapper(BaseLanguageModel):
                 if not is_valid:
                     # Show warning to user
                     if error_msg:
-                        st.warning(f"🛡️ Input Safety: {error_msg}")
+                        self._warn(f"🛡️ Input Safety: {error_msg}")
                     
-                    # Return safe response
-                    safe_response = "I cannot process this request due to safety guidelines. Please rephrase your question."
-                    return self.llm._generate([HumanMessage(content=safe_response)], stop, run_manager, **kwargs)
+                    # Return safe response without calling the LLM
+                    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=SAFE_INPUT_RESPONSE))])
                 
                 # Update message with processed input if it was modified
                 if processed_input != user_input:
-                    messages[-1] = HumanMessage(content=processed_input)
+                    messages = messages[:-1] + [messages[-1].model_copy(update={"content": processed_input})]
             
             # Call original LLM
             result = self.llm._generate(messages, stop, run_manager, **kwargs)
             
             # Validate output
             if result and hasattr(result, 'generations') and result.generations:
-                for generation in result.generations:
-                    if hasattr(generation, 'message') and hasattr(generation.message, 'content'):
-                        output_content = generation.message.content
-                        
-                        is_valid, processed_output, error_msg = self.validation_service.validate_llm_output(
-                            output_content, self.usecase
-                        )
+                generations = [
+                    generation for generation in result.generations
+                    if hasattr(generation, 'message') and hasattr(generation.message, 'content')
+                ]
+                
+                def _validate(generation):
+                    return self.validation_service.validate_llm_output(generation.message.content, self.usecase)
+                
+                # Generations are independent, so validate n > 1 samples concurrently
+                if len(generations) > 1:
+                    verdicts = list(_VALIDATION_EXECUTOR.map(_validate, generations))
+                else:
+                    verdicts = [_validate(generation) for generation in generations]
+                
+                for generation, (is_valid, processed_output, error_msg) in zip(generations, verdicts):
+                    if not is_valid:
+                        # Show warning to user
+                        if error_msg:
+                            self._warn("🛡️ Output Safety: Response was filtered for safety")
                         
-                        if not is_valid:
-                            # Show warning to user
-                            if error_msg:
-                                st.warning(f"🛡️ Output Safety: Response was filtered for safety")
-                            
-                            # Replace with processed (safe) output
-                            generation.message.content = processed_output
+                        # Replace with processed (safe) output
+                        generation.message.content = processed_output
             
             return result
             
@@ -80,63 +141,297 @@ class GuardrailsLLMWrapper(BaseLanguageModel):
             # If validation fails, fall back to original LLM
             return self.llm._generate(messages, stop, run_manager, **kwargs)
     
+    def _validate_input(self, input_data, verdicts=None):
+        """
+        Validate user input before it reaches the LLM
+
+        Args:
+            input_data: String or list of messages
+            verdicts: Optional precomputed validation results keyed by input text
+
+        Returns:
+            Tuple[Any, Optional[AIMessage]]: (processed_input, rejection_response)
+        """
+        # Handle different input types
+        if isinstance(input_data, str):
+            # Validate string input
+            is_valid, processed_input, error_msg = self._check_input(input_data, verdicts)
+            
+            if not is_valid:
+                if error_msg:
+                    self._warn(f"🛡️ Input Safety: {error_msg}")
+                return input_data, AIMessage(content=SAFE_INPUT_RESPONSE)
+            
+            input_data = processed_input
+        
+        elif isinstance(input_data, list):
+            # Validate list of messages
+            original = input_data
+            for i, message in enumerate(original):
+                if isinstance(message, HumanMessage):
+                    is_valid, processed_input, error_msg = self._check_input(message.content, verdicts)
+                    
+                    if not is_valid:
+                        if error_msg:
+                            self._warn(f"🛡️ Input Safety: {error_msg}")
+                        return input_data, AIMessage(content=SAFE_INPUT_RESPONSE)
+                    
+                    # Only touch messages validation actually changed, and never
+                    # the caller's list, so the serialized prompt prefix stays
+                    # byte-identical for provider-side prompt caching
+                    if processed_input != message.content:
+                        if input_data is original:
+                            input_data = list(input_data)
+                        input_data[i] = message.model_copy(update={"content": processed_input})
+        
+        return input_data, None
+    
+    def _check_input(self, text, verdicts=None):
+        """Look up a precomputed verdict for text, validating it if missing"""
+        if verdicts and isinstance(text, str) and text in verdicts:
+            return verdicts[text]
+        return self.validation_service.validate_user_input(text)
+    
+    def _validate_output(self, result, prompt=None):
+        """Validate LLM output in place and cache it when it passes"""
+        if isinstance(result, AIMessage) and result.content:
+            is_valid, processed_output, error_msg = self.validation_service.validate_llm_output(
+                result.content, self.usecase
+            )
+            
+            if not is_valid:
+                if error_msg:
+                    self._warn("🛡️ Output Safety: Response was filtered for safety")
+                result.content = processed_output
+            elif prompt:
+                self.response_cache.insert(*prompt, result)
+        
+        return result
+    
+    def _prepare_call(self, input_data, verdicts=None):
+        """
+        Validate input and probe the response cache
+
+        Returns:
+            Tuple[Any, Optional[tuple], Optional[AIMessage]]: (processed_input, cache_prompt, local_response)
+        """
+        input_data, rejection = self._validate_input(input_data, verdicts)
+        if rejection is not None:
+            return input_data, None, rejection
+        
+        # Serve repeated or paraphrased prompts from the response cache
+        prompt = split_prompt(input_data) if self.response_cache else None
+        if prompt:
+            cached = self.response_cache.lookup(*prompt)
+            if cached is not None:
+                return input_data, prompt, cached
+        
+        return input_data, prompt, None
+    
     def invoke(self, input_data, config=None, **kwargs):
         """Invoke with validation"""
         try:
-            # Handle different input types
-            if isinstance(input_data, str):
-                # Validate string input
-                is_valid, processed_input, error_msg = self.validation_service.validate_user_input(input_data)
-                
-                if not is_valid:
-                    if error_msg:
-                        st.warning(f"🛡️ Input Safety: {error_msg}")
-                    return AIMessage(content="I cannot process this request due to safety guidelines. Please rephrase your question.")
-                
-                input_data = processed_input
-            
-            elif isinstance(input_data, list):
-                # Validate list of messages
-                for i, message in enumerate(input_data):
-                    if isinstance(message, HumanMessage):
-                        is_valid, processed_input, error_msg = self.validation_service.validate_user_input(message.content)
-                        
-                        if not is_valid:
-                            if error_msg:
-                                st.warning(f"🛡️ Input Safety: {error_msg}")
-                            return AIMessage(content="I cannot process this request due to safety guidelines. Please rephrase your question.")
-                        
-                        if processed_input != message.content:
-                            input_data[i] = HumanMessage(content=processed_input)
+            input_data, prompt, response = self._prepare_call(input_data)
+            if response is not None:
+                return response
             
             # Call original LLM
             result = self.llm.invoke(input_data, config, **kwargs)
             
             # Validate output
-            if isinstance(result, AIMessage) and result.content:
-                is_valid, processed_output, error_msg = self.validation_service.validate_llm_output(
-                    result.content, self.usecase
-                )
-                
-                if not is_valid:
-                    if error_msg:
-                        st.warning(f"🛡️ Output Safety: Response was filtered for safety")
-                    result.content = processed_output
-            
-            return result
+            return self._validate_output(result, prompt)
             
         except Exception as e:
             # Fall back to original LLM
             return self.llm.invoke(input_data, config, **kwargs)
     
+    async def ainvoke(self, input_data, config=None, **kwargs):
+        """Async invoke with validation"""
+        try:
+            input_data, prompt, response = self._prepare_call(input_data)
+            if response is not None:
+                return response
+            
+            result = await self.llm.ainvoke(input_data, config, **kwargs)
+            return self._validate_output(result, prompt)
+            
+        except Exception as e:
+            # Fall back to original LLM
+            return await self.llm.ainvoke(input_data, config, **kwargs)
+    
+    def _validate_stream(self, chunks):
+        """Validate a fully buffered stream, replacing it with one safe chunk if it fails"""
+        if not chunks:
+            return chunks
+        
+        combined = chunks[0]
+        for chunk in chunks[1:]:
+            combined = combined + chunk
+        
+        if isinstance(combined, AIMessageChunk) and combined.content:
+            is_valid, processed_output, error_msg = self.validation_service.validate_llm_output(
+                combined.content, self.usecase
+            )
+            if not is_valid:
+                if error_msg:
+                    self._warn("🛡️ Output Safety: Response was filtered for safety")
+                return [AIMessageChunk(content=processed_output)]
+        
+        return chunks
+    
+    def stream(self, input_data, config=None, **kwargs):
+        """Stream with validation; output is held back until it has been validated"""
+        input_data, _, response = self._prepare_call(input_data)
+        if response is not None:
+            yield AIMessageChunk(content=response.content, tool_calls=getattr(response, "tool_calls", []))
+            return
+        
+        yield from self._validate_stream(list(self.llm.stream(input_data, config, **kwargs)))
+    
+    async def astream(self, input_data, config=None, **kwargs):
+        """Async stream with validation; output is held back until it has been validated"""
+        input_data, _, response = self._prepare_call(input_data)
+        if response is not None:
+            yield AIMessageChunk(content=response.content, tool_calls=getattr(response, "tool_calls", []))
+            return
+        
+        chunks = [chunk async for chunk in self.llm.astream(input_data, config, **kwargs)]
+        for chunk in self._validate_stream(chunks):
+            yield chunk
+    
+    def _prepare_batch(self, inputs):
+        """
+        Validate a batch upfront and answer rejections/cache hits locally
+
+        Returns:
+            Tuple[list, dict, list]: (results, cache_prompts_by_index, pending_inputs)
+        """
+        results = [None] * len(inputs)
+        prompts = {}
+        pending = []
+        
+        # Score every user message in one batched pass
+        texts = []
+        for input_data in inputs:
+            if isinstance(input_data, str):
+                texts.append(input_data)
+            elif isinstance(input_data, list):
+                texts.extend(
+                    m.content for m in input_data
+                    if isinstance(m, HumanMessage) and isinstance(m.content, str)
+                )
+        texts = list(dict.fromkeys(texts))
+        verdicts = dict(zip(texts, self.validation_service.validate_user_inputs_batched(texts)))
+        
+        for index, input_data in enumerate(inputs):
+            input_data, prompt, response = self._prepare_call(input_data, verdicts)
+            if response is not None:
+                results[index] = response
+                continue
+            
+            prompts[index] = prompt
+            pending.append((index, input_data))
+        
+        return results, prompts, pending
+    
+    async def _dispatch_batches(self, results, pending, configs, batch_size, delay_ms, **kwargs):
+        """Send pending inputs in concurrent chunks of batch_size; failures are stored per item"""
+        for start in range(0, len(pending), batch_size):
+            if start and delay_ms:
+                await asyncio.sleep(delay_ms / 1000)
+            chunk = pending[start:start + batch_size]
+            responses = await asyncio.gather(
+                *[self.llm.ainvoke(input_data, configs[index], **kwargs) for index, input_data in chunk],
+                return_exceptions=True,
+            )
+            for (index, _), response in zip(chunk, responses):
+                results[index] = response
+    
+    def _dispatch_sync(self, results, pending, configs, batch_size, delay_ms, **kwargs):
+        """Thread-pool variant of _dispatch_batches for callers already inside an event loop"""
+        for start in range(0, len(pending), batch_size):
+            if start and delay_ms:
+                time.sleep(delay_ms / 1000)
+            chunk = pending[start:start + batch_size]
+            responses = self.llm.batch(
+                [input_data for _, input_data in chunk],
+                [configs[index] for index, _ in chunk],
+                return_exceptions=True,
+                **kwargs,
+            )
+            for (index, _), response in zip(chunk, responses):
+                results[index] = response
+    
+    def _finish_batch(self, results, prompts, return_exceptions):
+        """Validate outputs in a single pass, raising the first failure unless return_exceptions"""
+        for index, prompt in prompts.items():
+            if isinstance(results[index], BaseException):
+                if not return_exceptions:
+                    raise results[index]
+                continue
+            results[index] = self._validate_output(results[index], prompt)
+        return results
+    
+    def batch(self, inputs, config=None, *, return_exceptions: bool = False,
+              batch_size: int = 5, delay_ms: int = 0, **kwargs):
+        """
+        Invoke several inputs concurrently with validation
+
+        Args:
+            inputs: List of inputs accepted by invoke
+            config: Config for every call, or a list with one config per input
+            return_exceptions: Return failed calls' exceptions in place instead of raising
+            batch_size: Number of requests in flight at once
+            delay_ms: Pause between batches to respect provider rate limits
+
+        Returns:
+            List of responses in the same order as inputs
+        """
+        # Only inputs that passed validation are ever sent, so failures are
+        # reported per item rather than retried unguarded
+        configs = get_config_list(config, len(inputs))
+        results, prompts, pending = self._prepare_batch(inputs)
+        if pending:
+            if _in_event_loop():
+                # asyncio.run can't start a second loop on this thread
+                self._dispatch_sync(results, pending, configs, batch_size, delay_ms, **kwargs)
+            else:
+                asyncio.run(self._dispatch_batches(results, pending, configs, batch_size, delay_ms, **kwargs))
+        return self._finish_batch(results, prompts, return_exceptions)
+    
+    async def abatch(self, inputs, config=None, *, return_exceptions: bool = False,
+                     batch_size: int = 5, delay_ms: int = 0, **kwargs):
+        """Async variant of batch"""
+        configs = get_config_list(config, len(inputs))
+        results, prompts, pending = self._prepare_batch(inputs)
+        if pending:
+            await self._dispatch_batches(results, pending, configs, batch_size, delay_ms, **kwargs)
+        return self._finish_batch(results, prompts, return_exceptions)
+    
     def bind_tools(self, tools, **kwargs):
         """Bind tools and return wrapped LLM"""
         bound_llm = self.llm.bind_tools(tools, **kwargs)
         return GuardrailsLLMWrapper(bound_llm, self.usecase)
     
+    def __setattr__(self, name, value):
+        # invoke/stream run the wrapped model, so callbacks attached here must reach it
+        if name == "callbacks":
+            self.llm.callbacks = value
+        super().__setattr__(name, value)
+    
+    @property
+    def _llm_type(self) -> str:
+        return getattr(self.llm, "_llm_type", "guardrails")
+    
     def __getattr__(self, name):
         """Delegate other attributes to the wrapped LLM"""
-        return getattr(self.llm, name)
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            llm = self.__dict__.get("llm")
+            if llm is None or name.startswith("__"):
+                raise
+            return getattr(llm, name)
 
 
 def create_guardrails_llm(llm: BaseLanguageModel, usecase: str = "general") -> BaseLanguageModel:
@@ -0,0 +1,286 @@
+"""
+Semantic Response Cache
+Short-circuits repeated or paraphrased prompts before they reach the LLM
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from ._cache_lookup import top_sim
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def _get_embedder():
+    """Load the sentence embedding model once per process (None if unavailable)"""
+    global _embedder
+    if SentenceTransformer is None:
+        return None
+    with _embedder_lock:
+        if _embedder is None:
+            try:
+                _embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            except Exception:
+                # Remember the failure so we don't retry the download every call
+                _embedder = False
+    return _embedder or None
+
+
+def _serialize_message(message: Any) -> Any:
+    """Reduce a message to a JSON-friendly (role, content[, tool calls]) list"""
+    if isinstance(message, BaseMessage):
+        tool_calls = [
+            [call.get("name"), call.get("args")] for call in getattr(message, "tool_calls", None) or []
+        ]
+        return [message.type, message.content, tool_calls] if tool_calls else [message.type, message.content]
+    if isinstance(message, dict):
+        return [message.get("role"), message.get("content")]
+    if isinstance(message, tuple):
+        return list(message)
+    return str(message)
+
+
+def split_prompt(input_data: Any) -> Optional[Tuple[str, str]]:
+    """
+    Split an LLM input into (context_key, query_text).
+
+    Only prompts that end with a user turn are cacheable; the context key
+    hashes every preceding message so answers never bleed across contexts.
+    """
+    if isinstance(input_data, str):
+        return "", input_data
+
+    if isinstance(input_data, list) and input_data:
+        last_message = input_data[-1]
+        if not isinstance(last_message, HumanMessage) or not isinstance(last_message.content, str):
+            return None
+
+        prefix = [_serialize_message(m) for m in input_data[:-1]]
+        context_key = ""
+        if prefix:
+            payload = json.dumps(prefix, sort_keys=True, default=str)
+            context_key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return context_key, last_message.content
+
+    return None
+
+
+class SemanticResponseCache:
+    """LRU/TTL cache of LLM responses matched by prompt embedding similarity"""
+
+    _INITIAL_CAPACITY = 16
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, threshold: float = 0.92,
+                 dtype: str = "float32"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        # float16 halves memory and scan bandwidth for large caches
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Row-aligned storage; arrays are preallocated and doubled on demand
+        self._size = 0
+        self._keys: List[str] = []
+        self._messages: List[AIMessage] = []
+        self._rows: Dict[str, int] = {}
+        # Context key <-> small int id, freed once no row uses the context
+        self._context_ids: Dict[str, int] = {}
+        self._context_keys: Dict[int, str] = {}
+        self._context_rows: Dict[int, int] = {}
+        self._next_context_id = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._inv_norms = np.zeros(0, dtype=np.float32)
+        self._contexts = np.zeros(0, dtype=np.int64)
+        self._expires = np.zeros(0, dtype=np.float64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+
+    @staticmethod
+    def _key(context_key: str, text: str) -> str:
+        return hashlib.sha256(f"{context_key}\x00{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _embed(text: str) -> Optional[np.ndarray]:
+        embedder = _get_embedder()
+        if embedder is None:
+            return None
+        try:
+            return np.asarray(embedder.encode(text), dtype=np.float32)
+        except Exception:
+            return None
+
+    def _grow(self, dim: Optional[int]):
+        """Double row capacity (and allocate the matrix once the dimension is known)"""
+        capacity = len(self._inv_norms)
+        if self._size >= capacity:
+            capacity = max(self._INITIAL_CAPACITY, capacity * 2)
+            self._inv_norms = np.resize(self._inv_norms, capacity)
+            self._contexts = np.resize(self._contexts, capacity)
+            self._expires = np.resize(self._expires, capacity)
+            self._last_used = np.resize(self._last_used, capacity)
+            if self._matrix is not None:
+                matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=self.dtype)
+                matrix[:self._size] = self._matrix[:self._size]
+                self._matrix = matrix
+
+        if self._matrix is None and dim is not None:
+            self._matrix = np.zeros((len(self._inv_norms), dim), dtype=self.dtype)
+
+    def _acquire_context(self, context_key: str) -> int:
+        context_id = self._context_ids.get(context_key)
+        if context_id is None:
+            context_id = self._next_context_id
+            self._next_context_id += 1
+            self._context_ids[context_key] = context_id
+            self._context_keys[context_id] = context_key
+        self._context_rows[context_id] = self._context_rows.get(context_id, 0) + 1
+        return context_id
+
+    def _release_context(self, context_id: int):
+        remaining = self._context_rows[context_id] - 1
+        if remaining:
+            self._context_rows[context_id] = remaining
+            return
+        del self._context_rows[context_id]
+        del self._context_ids[self._context_keys.pop(context_id)]
+
+    def _remove_row(self, row: int):
+        """Drop a row by moving the last row into its slot"""
+        last = self._size - 1
+        self._release_context(int(self._contexts[row]))
+        del self._rows[self._keys[row]]
+        if row != last:
+            self._keys[row] = self._keys[last]
+            self._messages[row] = self._messages[last]
+            self._rows[self._keys[row]] = row
+            self._inv_norms[row] = self._inv_norms[last]
+            self._contexts[row] = self._contexts[last]
+            self._expires[row] = self._expires[last]
+            self._last_used[row] = self._last_used[last]
+            if self._matrix is not None:
+                self._matrix[row] = self._matrix[last]
+        self._keys.pop()
+        self._messages.pop()
+        self._size = last
+
+    def _purge_expired(self, now: float):
+        for row in np.flatnonzero(self._expires[:self._size] <= now)[::-1]:
+            self._remove_row(int(row))
+
+    def lookup(self, context_key: str, text: str) -> Optional[AIMessage]:
+        """Return a cached response for an identical or near-identical prompt"""
+        key = self._key(context_key, text)
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            row = self._rows.get(key)
+            if row is not None:
+                self._last_used[row] = now
+                return self._messages[row].model_copy(deep=True)
+            if context_key not in self._context_ids or self._matrix is None:
+                return None
+
+        query = self._embed(text)
+        if query is None:
+            return None
+
+        with self._lock:
+            # The context may have been pruned while the lock was released
+            context_id = self._context_ids.get(context_key)
+            if self._size == 0 or context_id is None:
+                return None
+            row, similarity = top_sim(
+                self._matrix[:self._size], query, self._inv_norms[:self._size],
+                self._contexts[:self._size], context_id,
+            )
+            if similarity < self.threshold:
+                return None
+            self._last_used[row] = now
+            return self._messages[row].model_copy(deep=True)
+
+    def insert(self, context_key: str, text: str, message: AIMessage):
+        """Store a validated response for later reuse"""
+        embedding = self._embed(text)
+        key = self._key(context_key, text)
+        now = time.monotonic()
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                if self._size >= self.maxsize:
+                    self._remove_row(int(np.argmin(self._last_used[:self._size])))
+                self._grow(None if embedding is None else embedding.shape[0])
+                row = self._size
+                self._size += 1
+                self._keys.append(key)
+                self._messages.append(None)
+                self._rows[key] = row
+                # The key covers context_key, so an existing row keeps its context
+                self._contexts[row] = self._acquire_context(context_key)
+
+            self._messages[row] = message.model_copy(deep=True)
+            self._expires[row] = now + self.ttl
+            self._last_used[row] = now
+            self._inv_norms[row] = 0.0
+            if self._matrix is not None:
+                if embedding is not None and embedding.shape[0] == self._matrix.shape[1]:
+                    self._matrix[row] = embedding
+                    norm = np.linalg.norm(self._matrix[row].astype(np.float32))
+                    self._inv_norms[row] = 1.0 / norm if norm > 0 else 0.0
+                else:
+                    self._matrix[row] = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+def cache_namespace(llm: Any) -> str:
+    """Identify the model (and bound tool set) behind an LLM for cache partitioning"""
+    bound = getattr(llm, "bound", None)
+    namespace = str(getattr(bound if bound is not None else llm, "model_name", "") or "")
+    tools = getattr(llm, "kwargs", {}).get("tools") if bound is not None else None
+    if tools:
+        payload = json.dumps(tools, sort_keys=True, default=str)
+        namespace += ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    return namespace
+
+
+_caches: Dict[Tuple[str, str], SemanticResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def is_response_cache_enabled() -> bool:
+    """Check if response caching is enabled"""
+    return os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+
+
+def get_response_cache(usecase: str, model_name: str = "") -> SemanticResponseCache:
+    """Get the shared cache for a (usecase, model) pair so it survives Streamlit reruns"""
+    with _caches_lock:
+        cache = _caches.get((usecase, model_name))
+        if cache is None:
+            cache = SemanticResponseCache(
+                maxsize=int(os.getenv("RESPONSE_CACHE_MAXSIZE", "1024")),
+                ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+                threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+                dtype=os.getenv("RESPONSE_CACHE_DTYPE", "float32"),
+            )
+            _caches[(usecase, model_name)] = cache
+        return cache
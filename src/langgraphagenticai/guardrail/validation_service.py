@@ -2,8 +2,20 @@
 Guardrails Validation Service
 Provides validation methods for inputs and outputs
 """
-from typing import Dict, Any, Optional, Tuple
-from .guardrails_config import guardrails_config
+from typing import Dict, Any, List, Optional, Tuple
+from .guardrails_config import (
+    INPUT_TOXICITY_THRESHOLD,
+    fused_classifier_enabled,
+    guardrails_config,
+    load_toxicity_model,
+    score_toxicity,
+    split_sentences,
+    toxic_sentences_message,
+)
+
+
+# Usecases whose output is checked with the content moderation guard
+_MODERATED_USECASES = frozenset({"MCP Chatbot", "Chatbot with Tool"})
 
 
 class ValidationService:
@@ -46,6 +58,52 @@ class ValidationService:
             # Fail silently - validation should not break the app
             return True, user_input, None
     
+    def validate_user_inputs_batched(self, user_inputs: List[str]) -> List[Tuple[bool, str, Optional[str]]]:
+        """
+        Validate many user inputs with a single toxicity forward pass
+        
+        Returns:
+            List[Tuple[bool, str, Optional[str]]]: one (is_valid, processed_input, error_message) per input
+        """
+        try:
+            if not self.config.is_enabled() or not user_inputs:
+                return [(True, user_input, None) for user_input in user_inputs]
+            
+            screening_guard = self.config.get_guard("input_screening")
+            # The fused classifier scores whole texts by label group; only the
+            # sentence-level toxicity check can be reproduced here exactly
+            if fused_classifier_enabled() or not load_toxicity_model() or not screening_guard:
+                return [self.validate_user_input(user_input) for user_input in user_inputs]
+            
+            # Score every sentence of every input in one padded forward pass,
+            # the same way the input_safety guard scores one input
+            sentences = [split_sentences(user_input) or [user_input] for user_input in user_inputs]
+            scores = score_toxicity([sentence for group in sentences for sentence in group]).max(axis=-1)
+            
+            results = []
+            offset = 0
+            for user_input, group in zip(user_inputs, sentences):
+                group_scores = scores[offset:offset + len(group)]
+                offset += len(group)
+                toxic = [sentence for sentence, score in zip(group, group_scores) if score >= INPUT_TOXICITY_THRESHOLD]
+                
+                # Remaining checks (profanity, length) are cheap and run per item
+                result = screening_guard.validate(user_input)
+                errors = [toxic_sentences_message(toxic)] if toxic else []
+                if not result.validation_passed:
+                    errors.extend(failure.error_message for failure in result.validation_failures)
+                
+                if errors:
+                    results.append((False, user_input, "Input validation failed: " + "; ".join(errors)))
+                else:
+                    results.append((True, result.validated_output, None))
+            
+            return results
+            
+        except Exception as e:
+            # Fall back to per-item validation
+            return [self.validate_user_input(user_input) for user_input in user_inputs]
+    
     def validate_llm_output(self, llm_output: str, usecase: str = "general") -> Tuple[bool, str, Optional[str]]:
         """
         Validate LLM output for quality and safety
@@ -58,7 +116,7 @@ class ValidationService:
                 return True, llm_output, None
             
             # Get appropriate guard based on use case
-            if usecase in ["MCP Chatbot", "Chatbot with Tool"]:
+            if usecase in _MODERATED_USECASES:
                 guard = self.config.get_guard("content_moderation")
             else:
                 guard = self.config.get_guard("output_quality")
@@ -125,10 +183,13 @@ class ValidationService:
             if not self.config.is_enabled():
                 return {"enabled": False}
             
+            # input_screening is input_safety minus toxicity, used only to
+            # speed up batches, so it isn't reported as a separate guard
+            guards = [name for name in self.config.guards if name != "input_screening"]
             return {
                 "enabled": True,
-                "guards_available": list(self.config.guards.keys()),
-                "total_guards": len(self.config.guards)
+                "guards_available": guards,
+                "total_guards": len(guards)
             }
         except Exception:
             return {"enabled": False}
@@ -0,0 +1,84 @@
+"""
+Cached ChatGroq
+Exact-match prompt cache for deterministic (temperature 0) Groq calls
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import Any, ClassVar, Dict, List, Optional
+
+from cachetools import TTLCache
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_groq import ChatGroq
+
+
+class CachedChatGroq(ChatGroq):
+    """ChatGroq that reuses results for byte-identical deterministic requests"""
+
+    # Shared across instances: GroqLLM builds a fresh client on every Streamlit rerun
+    _cache: ClassVar[TTLCache] = TTLCache(
+        maxsize=int(os.getenv("GROQ_CACHE_MAXSIZE", "1024")),
+        ttl=float(os.getenv("GROQ_CACHE_TTL", "3600")),
+    )
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    stats: ClassVar[Dict[str, int]] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _message_key(message: BaseMessage) -> list:
+        # Only what the model sees; ids, response_metadata and usage differ
+        # between otherwise identical turns and would defeat the cache
+        tool_calls = [
+            [call.get("name"), call.get("args")] for call in getattr(message, "tool_calls", None) or []
+        ]
+        return [message.type, message.content, tool_calls, message.name]
+
+    def _api_key_bytes(self) -> bytes:
+        api_key = self.groq_api_key
+        secret = api_key.get_secret_value() if api_key is not None else ""
+        return secret.encode("utf-8")
+
+    def _cache_key(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> str:
+        payload = {
+            # Scope entries to the API key so users never share answers and a
+            # bad key can't be served from another key's cache
+            "api_key": hashlib.sha256(self._api_key_bytes()).hexdigest(),
+            "model": self.model_name,
+            "messages": [self._message_key(message) for message in messages],
+            "tools": kwargs.pop("tools", None),
+            "temperature": self.temperature,
+            "stop": stop,
+            "kwargs": kwargs,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Sampled outputs are not reproducible, so only cache deterministic calls
+        if self.temperature is None or self.temperature > 0:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+
+        key = self._cache_key(messages, stop, **kwargs)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            self.stats["hits" if cached is not None else "misses"] += 1
+
+        if cached is not None:
+            # Surface the hit on the run so Langfuse traces show it
+            llm_output = dict(cached.llm_output or {})
+            llm_output["cache_hit"] = True
+            # Deep copy so callers mutating the result can't corrupt the cache
+            return ChatResult(generations=copy.deepcopy(cached.generations), llm_output=llm_output)
+
+        result = super()._generate(messages, stop, run_manager, **kwargs)
+        with self._cache_lock:
+            self._cache[key] = result.model_copy(deep=True)
+        return result
@@ -1,6 +1,6 @@
 import os
 import streamlit as st
-from langchain_groq import ChatGroq
+from src.langgraphagenticai.llms.cached_groq import CachedChatGroq
 from src.langgraphagenticai.monitoring.langfuse_integration import create_monitored_llm, get_langfuse_callbacks
 from src.langgraphagenticai.guardrail.llm_wrapper import create_guardrails_llm
 from src.langgraphagenticai.memori_integration import wrap_llm_with_memori
@@ -19,10 +19,15 @@ class GroqLLM:
                 st.error("Please enter the GROQ API key and select a model")
                 return None
 
-            # Create base LLM first
-            llm = ChatGroq(
+            # Create base LLM first. The model's default temperature is kept;
+            # setting GROQ_TEMPERATURE=0 opts in to serving repeats from cache
+            llm_kwargs = {}
+            if os.getenv("GROQ_TEMPERATURE"):
+                llm_kwargs["temperature"] = float(os.getenv("GROQ_TEMPERATURE"))
+            llm = CachedChatGroq(
                 api_key=groq_api_key, 
-                model=selected_groq_model
+                model=selected_groq_model,
+                **llm_kwargs
             )
             
             # Add Guardrails protection
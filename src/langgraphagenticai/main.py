@@ -1,10 +1,120 @@
 import streamlit as st
+import functools
+import hashlib
 import json
 import os
+from typing import Callable, Dict, Optional
 from src.langgraphagenticai.ui.streamlitui.loadui import LoadStreamlitUI
-from src.langgraphagenticai.llms.groqllm import GroqLLM
-from src.langgraphagenticai.graph.graph_builder import GraphBuilder
-from src.langgraphagenticai.ui.streamlitui.display_result import DisplayResultStremlit
+
+
+# LangChain, LangGraph, Groq and Langfuse are only imported once the user
+# submits a message, so the first page render doesn't pay for them
+@functools.cache
+def _get_groq_llm():
+    from src.langgraphagenticai.llms.groqllm import GroqLLM
+    return GroqLLM
+
+
+@functools.cache
+def _get_graph_builder():
+    from src.langgraphagenticai.graph.graph_builder import GraphBuilder
+    return GraphBuilder
+
+
+@functools.cache
+def _get_display_result():
+    from src.langgraphagenticai.ui.streamlitui.display_result import DisplayResultStremlit
+    return DisplayResultStremlit
+
+
+@functools.cache
+def _get_langfuse_ready():
+    from src.langgraphagenticai.monitoring.langfuse_integration import is_langfuse_ready
+    return is_langfuse_ready
+
+
+@functools.cache
+def _get_flush_guardrail_warnings():
+    from src.langgraphagenticai.guardrail.llm_wrapper import flush_guardrail_warnings
+    return flush_guardrail_warnings
+
+
+# Usecase groups, tested on every rerun
+_TOOL_USECASES = frozenset({"Chatbot with Tool", "AI News"})
+_MCP_USECASES = frozenset({"MCP Chatbot"})
+
+
+def _prepare_default(user_input: dict) -> Optional[dict]:
+    """Usecases that need no extra setup"""
+    return {}
+
+
+def _prepare_tavily(user_input: dict) -> Optional[dict]:
+    """Export the TAVILY API key for tool-based usecases"""
+    tavily_key = user_input.get("TAVILY_API_KEY")
+    if not tavily_key:
+        st.error("TAVILY API key is required for this usecase")
+        return None
+    # Only touch the process environment when the key actually changes
+    if os.environ.get("TAVILY_API_KEY") != tavily_key:
+        os.environ["TAVILY_API_KEY"] = tavily_key
+    return {}
+
+
+def _prepare_mcp(user_input: dict) -> Optional[dict]:
+    """Pass the MCP server configuration through to the graph builder"""
+    mcp_config = user_input.get("mcp_config")
+    if not mcp_config:
+        st.error("MCP configuration is required for MCP Chatbot")
+        return None
+    return {"mcp_config": mcp_config}
+
+
+# Per-usecase setup, returning the extra setup_graph kwargs (None aborts the turn)
+USECASE_HANDLERS: Dict[str, Callable[[dict], Optional[dict]]] = {
+    **dict.fromkeys(_TOOL_USECASES, _prepare_tavily),
+    **dict.fromkeys(_MCP_USECASES, _prepare_mcp),
+}
+
+
+def _credentials_key(user_input: dict) -> str:
+    """Digest of the API keys baked into a built graph, so key changes force a rebuild"""
+    secrets = "\x00".join(user_input.get(name) or "" for name in ("GROQ_API_KEY", "TAVILY_API_KEY"))
+    return hashlib.sha256(secrets.encode("utf-8")).hexdigest()
+
+
+# Session-state key holding this session's (build key, compiled graph)
+GRAPH_STATE_KEY = "_graph"
+
+
+def _get_graph(usecase: str, model_id: Optional[str], credentials_key: str,
+               mcp_config_json: Optional[str], monitoring_ready: bool, user_input: dict):
+    """
+    Build the LLM and compiled graph once per (usecase, model, credentials, MCP config).
+
+    The graph holds stateful wrappers (Memori remembers the last turn it
+    recorded), so it is kept per session in st.session_state rather than in
+    a cache shared by every session.
+
+    monitoring_ready is part of the key so a graph built while Langfuse was
+    still warming up (and so without its callbacks) is rebuilt once it's ready.
+
+    Returns None when the LLM can't be created; GroqLLM has already told the user why.
+    """
+    key = (usecase, model_id, credentials_key, mcp_config_json, monitoring_ready)
+    cached = st.session_state.get(GRAPH_STATE_KEY)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    # Configure LLM with usecase for appropriate guardrails
+    model = _get_groq_llm()(user_controls_input=user_input).get_llm_model(usecase=usecase)
+    if not model:
+        return None
+
+    graph_kwargs = {"mcp_config": json.loads(mcp_config_json)} if mcp_config_json else {}
+    graph = _get_graph_builder()(model).setup_graph(usecase=usecase, **graph_kwargs)
+    st.session_state[GRAPH_STATE_KEY] = (key, graph)
+    return graph
 
 
 # Main function START
@@ -29,45 +139,35 @@ def load_langgraph_agenticai_app():
             # Get usecase first
             usecase = user_input.get("selected_usecase", "general")
             
-            # Configure LLM with usecase for appropriate guardrails
-            obj_llm_config = GroqLLM(user_controls_input=user_input)
-            model = obj_llm_config.get_llm_model(usecase=usecase)
-
-            if not model:
-                st.error("Error: LLM model could not be initialized")
-                return
-
             # Validate usecase
             if not usecase:
                 st.error("Error: no usecase selected")
                 return
 
-            # Set TAVILY API key if needed for tool-based usecases
-            if usecase in ["Chatbot with Tool", "AI News"]:
-                tavily_key = user_input.get("TAVILY_API_KEY")
-                if tavily_key:
-                    os.environ["TAVILY_API_KEY"] = tavily_key
-                else:
-                    st.error("TAVILY API key is required for this usecase")
-                    return
-
-            # Graph Builder
-            graph_builder = GraphBuilder(model)
+            graph_kwargs = USECASE_HANDLERS.get(usecase, _prepare_default)(user_input)
+            if graph_kwargs is None:
+                return
 
+            mcp_config = graph_kwargs.get("mcp_config")
             try:
-                # Pass MCP config if it's an MCP usecase
-                if usecase == "MCP Chatbot":
-                    mcp_config = user_input.get("mcp_config")
-                    if not mcp_config:
-                        st.error("MCP configuration is required for MCP Chatbot")
-                        return
-                    graph = graph_builder.setup_graph(usecase=usecase, mcp_config=mcp_config)
-                else:
-                    graph = graph_builder.setup_graph(usecase=usecase)
-                DisplayResultStremlit(
+                graph = _get_graph(
+                    usecase,
+                    user_input.get("selected_groq_model"),
+                    _credentials_key(user_input),
+                    json.dumps(mcp_config, sort_keys=True) if mcp_config else None,
+                    _get_langfuse_ready()(),
+                    user_input,
+                )
+                if graph is None:
+                    return
+                _get_display_result()(
                     usecase, graph, user_message
                 ).display_result_on_ui()
             except Exception as e:
                 st.error(f"Error: Graph setup failed - {e}")
+            finally:
+                # Show guardrail warnings collected during this turn in one place,
+                # including the ones raised on the way to a failure
+                _get_flush_guardrail_warnings()()
         except Exception as e:
             raise ValueError(f"Error occur with exception : {e}")
@@ -3,8 +3,9 @@ MCP Client Manager
 Handles connections to MCP servers and tool management
 """
 import asyncio
-import subprocess
-from typing import Dict, List, Any, Optional
+import itertools
+import time
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
 from langchain_mcp_adapters import MCPToolkit
 from mcp import ClientSession, StdioServerParameters
@@ -18,6 +19,12 @@ class MCPClientManager:
         self.config = MCPConfig()
         self.active_sessions: Dict[str, ClientSession] = {}
         self.toolkits: Dict[str, MCPToolkit] = {}
+        # Filtered tool lists per server, filled on first get_all_tools call
+        self._tools_cache: Dict[str, List[Any]] = {}
+        self._disabled_cache: Dict[str, frozenset] = {}
+        # (level, message) pairs from concurrent connects/disconnects, shown
+        # together by render_events once the whole round has finished
+        self._events: List[Tuple[str, str]] = []
 
     async def connect_to_server(self, server_name: str, server_config: Dict[str, Any]) -> Optional[MCPToolkit]:
         """Connect to an MCP server and return its toolkit"""
@@ -45,11 +52,11 @@ class MCPClientManager:
             toolkit = MCPToolkit(session=session)
             self.toolkits[server_name] = toolkit
             
-            st.success(f"✅ Connected to MCP server: {server_name}")
+            self._events.append(("success", f"✅ Connected to MCP server: {server_name}"))
             return toolkit
             
         except Exception as e:
-            st.error(f"❌ Failed to connect to MCP server {server_name}: {e}")
+            self._events.append(("error", f"❌ Failed to connect to MCP server {server_name}: {e}"))
             return None
 
     async def connect_all_servers(self) -> Dict[str, MCPToolkit]:
@@ -57,21 +64,44 @@ class MCPClientManager:
         enabled_servers = self.config.get_enabled_servers()
         connected_toolkits = {}
         
-        for server_name, server_config in enabled_servers.items():
-            toolkit = await self.connect_to_server(server_name, server_config)
-            if toolkit:
+        # Connect concurrently: total time is the slowest server, not the sum
+        results = await asyncio.gather(
+            *(self.connect_to_server(name, config) for name, config in enabled_servers.items()),
+            return_exceptions=True
+        )
+        
+        for server_name, toolkit in zip(enabled_servers.keys(), results):
+            if isinstance(toolkit, BaseException):
+                self._events.append(("warning", f"⚠️ Error connecting to MCP server {server_name}: {toolkit}"))
+            elif toolkit:
                 connected_toolkits[server_name] = toolkit
         
+        self.render_events()
         return connected_toolkits
 
+    def render_events(self, label: str = "MCP servers"):
+        """Show queued connection messages in one collapsed status block"""
+        if not self._events:
+            return
+        events, self._events = self._events, []
+        state = "error" if any(level == "error" for level, _ in events) else "complete"
+        with st.status(label, expanded=False, state=state):
+            for level, message in events:
+                getattr(st, level)(message)
+
     def get_all_tools(self) -> List[Any]:
         """Get all tools from all connected MCP servers"""
-        all_tools = []
-        
+        loaded_servers = 0
         for server_name, toolkit in self.toolkits.items():
+            if server_name in self._tools_cache:
+                continue
+            
             try:
-                server_config = self.config.get_server_config(server_name)
-                disabled_tools = server_config.get("disabledTools", [])
+                disabled_tools = self._disabled_cache.get(server_name)
+                if disabled_tools is None:
+                    server_config = self.config.get_server_config(server_name) or {}
+                    disabled_tools = frozenset(server_config.get("disabledTools", []))
+                    self._disabled_cache[server_name] = disabled_tools
                 
                 # Get tools from toolkit
                 tools = toolkit.get_tools()
@@ -82,12 +112,15 @@ class MCPClientManager:
                     if tool.name not in disabled_tools
                 ]
                 
-                all_tools.extend(enabled_tools)
-                st.info(f"📦 Loaded {len(enabled_tools)} tools from {server_name}")
+                self._tools_cache[server_name] = enabled_tools
+                loaded_servers += 1
                 
             except Exception as e:
                 st.warning(f"⚠️ Error getting tools from {server_name}: {e}")
         
+        all_tools = list(itertools.chain.from_iterable(self._tools_cache.values()))
+        if loaded_servers:
+            st.info(f"📦 {len(all_tools)} tools loaded from {len(self._tools_cache)} servers")
         return all_tools
 
     async def disconnect_all(self):
@@ -95,26 +128,58 @@ class MCPClientManager:
         for server_name, session in self.active_sessions.items():
             try:
                 await session.close()
-                st.info(f"🔌 Disconnected from {server_name}")
+                self._events.append(("info", f"🔌 Disconnected from {server_name}"))
             except Exception as e:
-                st.warning(f"⚠️ Error disconnecting from {server_name}: {e}")
+                self._events.append(("warning", f"⚠️ Error disconnecting from {server_name}: {e}"))
         
         self.active_sessions.clear()
         self.toolkits.clear()
+        self._tools_cache.clear()
+        self._disabled_cache.clear()
+        self.render_events()
 
-    def is_server_available(self, server_name: str) -> bool:
+    async def is_server_available(self, server_name: str) -> bool:
         """Check if a server is available and responding"""
         server_config = self.config.get_server_config(server_name)
         if not server_config:
             return False
         
+        return await _probe_command(server_config["command"])
+
+    async def check_all(self) -> Dict[str, bool]:
+        """Check availability of every enabled server in one concurrent round"""
+        server_names = list(self.config.get_enabled_servers())
+        results = await asyncio.gather(*(self.is_server_available(name) for name in server_names))
+        return dict(zip(server_names, results))
+
+
+# command -> (checked_at, available); probes are reused for _PROBE_TTL seconds
+_PROBE_TTL = 30.0
+_probe_cache: Dict[str, Tuple[float, bool]] = {}
+
+
+async def _probe_command(command: str) -> bool:
+    """Run `command --help` without blocking the event loop, caching the result"""
+    now = time.monotonic()
+    cached = _probe_cache.get(command)
+    if cached and now - cached[0] < _PROBE_TTL:
+        return cached[1]
+    
+    try:
+        # Try to run the command to see if it's available
+        process = await asyncio.create_subprocess_exec(
+            command, "--help",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
         try:
-            # Try to run the command to see if it's available
-            result = subprocess.run(
-                [server_config["command"], "--help"],
-                capture_output=True,
-                timeout=5
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
\ No newline at end of file
+            available = await asyncio.wait_for(process.wait(), timeout=2.0) == 0
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            available = False
+    except Exception:
+        available = False
+    
+    _probe_cache[command] = (now, available)
+    return available
@@ -5,15 +5,32 @@ Handles loading and managing MCP server configurations
 
 import json
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Parsed config files keyed by path -> (mtime_ns, size, config); Streamlit
+# reruns rebuild MCPConfig constantly, so only re-read files that changed
+_CONFIG_CACHE: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
 
 class MCPConfig:
     def __init__(self):
         self.workspace_config_path = ".kiro/settings/mcp.json"
         self.user_config_path = os.path.expanduser("~/.kiro/settings/mcp.json")
         self.config = self._load_config()
+        # Lookup views built once per load; treat them as read-only
+        self._server_index: Dict[str, Dict[str, Any]] = self.config.get("mcpServers", {})
+        self._enabled: Dict[str, Dict[str, Any]] = {
+            name: server_config
+            for name, server_config in self._server_index.items()
+            if not server_config.get("disabled", False)
+        }
 
     def _load_config(self) -> Dict[str, Any]:
         """Load MCP configuration from workspace and user level configs"""
@@ -32,26 +49,36 @@ class MCPConfig:
         return config
 
     def _load_config_file(self, file_path: str) -> Optional[Dict[str, Any]]:
-        """Load a single MCP config file"""
+        """Load a single MCP config file (cached until its mtime or size changes)"""
+        try:
+            with open(file_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                cached = _CONFIG_CACHE.get(file_path)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    return cached[2]
+                data = f.read()
+        except FileNotFoundError:
+            _CONFIG_CACHE.pop(file_path, None)
+            return None
+        except OSError as e:
+            st.warning(f"Error loading MCP config from {file_path}: {e}")
+            return None
+
         try:
-            if os.path.exists(file_path):
-                with open(file_path, "r") as f:
-                    return json.load(f)
+            config = orjson.loads(data) if orjson is not None else json.loads(data)
+            _CONFIG_CACHE[file_path] = (stat.st_mtime_ns, stat.st_size, config)
+            return config
         except Exception as e:
             st.warning(f"Error loading MCP config from {file_path}: {e}")
         return None
 
     def get_enabled_servers(self) -> Dict[str, Dict[str, Any]]:
         """Get all enabled MCP servers"""
-        enabled_servers = {}
-        for server_name, server_config in self.config.get("mcpServers", {}).items():
-            if not server_config.get("disabled", False):
-                enabled_servers[server_name] = server_config
-        return enabled_servers
+        return self._enabled
 
     def get_server_config(self, server_name: str) -> Optional[Dict[str, Any]]:
         """Get configuration for a specific server"""
-        return self.config.get("mcpServers", {}).get(server_name)
+        return self._server_index.get(server_name)
 
     def create_default_config(self):
         """Create a default MCP configuration file"""
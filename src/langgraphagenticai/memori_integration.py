@@ -17,15 +17,248 @@ Usage:
 
 """
 from typing import Any, List, Optional
-import os
+import atexit
+import functools
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from cachetools import TTLCache
 from memori import Memori, create_memory_tool
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
+try:
+    from memori.database.models import ChatHistory
+except ImportError:
+    ChatHistory = None
+
+
+logger = logging.getLogger(__name__)
+
 
 class MemoryDisabledException(Exception):
     pass
 
 
+# Memory search results keyed by (id(memory_tool), normalized query). The
+# wrapper is rebuilt on every Streamlit rerun, so the cache lives here.
+_MEMORY_CACHE_MAX_CHARS = 8192
+_memory_lookup_cache = TTLCache(maxsize=256, ttl=300)
+_memory_lookup_lock = threading.Lock()
+
+
+def _write_conversation(memory_system: Any, user_input: str, ai_output: str) -> bool:
+    """Record one turn; returns False if it could not be written"""
+    try:
+        # Try known record method from example
+        if hasattr(memory_system, "record_conversation"):
+            memory_system.record_conversation(user_input=user_input, ai_output=ai_output)
+            return True
+
+        # Try generic store/ingest methods
+        if hasattr(memory_system, "ingest"):
+            memory_system.ingest({"user_input": user_input, "ai_output": ai_output})
+            return True
+
+        if hasattr(memory_system, "record"):
+            memory_system.record({"user_input": user_input, "ai_output": ai_output})
+            return True
+
+    except Exception as e:
+        logger.warning("[Memori] failed to record conversation: %s", e)
+    return False
+
+
+# Conversation writes are handed to one daemon thread so the DB write is
+# off the request path; when the queue is full the oldest write is dropped.
+_WRITE_QUEUE: "queue.Queue" = queue.Queue(maxsize=1024)
+
+
+def _enqueue_write(item: tuple):
+    while True:
+        try:
+            _WRITE_QUEUE.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                _WRITE_QUEUE.get_nowait()
+                _WRITE_QUEUE.task_done()
+            except queue.Empty:
+                pass
+
+
+# Writes arriving within _WRITE_WINDOW_S of each other (up to _WRITE_BATCH_MAX)
+# are coalesced and committed together per memory system; turns that fail are
+# re-queued, up to _WRITE_MAX_ATTEMPTS tries each
+_WRITE_WINDOW_S = 0.05
+_WRITE_BATCH_MAX = 32
+_WRITE_MAX_ATTEMPTS = 3
+_write_stats = {"writes": 0, "batches": 0}
+
+
+def _collect_writes() -> list:
+    pending = [_WRITE_QUEUE.get()]
+    deadline = time.monotonic() + _WRITE_WINDOW_S
+    while len(pending) < _WRITE_BATCH_MAX:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            pending.append(_WRITE_QUEUE.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return pending
+
+
+def _insert_chat_rows(engine: Any, memory_system: Any, writes: list) -> List[str]:
+    """Insert turns into Memori's chat_history in one transaction, returning their chat ids"""
+    timestamp = datetime.now()
+    rows = [
+        {
+            "chat_id": str(uuid.uuid4()),
+            "user_input": user_input,
+            "ai_output": ai_output,
+            "model": "unknown",
+            "timestamp": timestamp,
+            "session_id": memory_system.session_id,
+            "namespace": memory_system.namespace,
+            "tokens_used": 0,
+            "metadata_json": {},
+        }
+        for user_input, ai_output, _ in writes
+    ]
+    # One transaction, and so one commit/fsync, for the whole batch
+    with engine.begin() as conn:
+        conn.execute(ChatHistory.__table__.insert(), rows)
+    return [row["chat_id"] for row in rows]
+
+
+def _write_batch(memory_system: Any, writes: list) -> list:
+    """
+    Write one memory system's collected turns, committed together through Memori's engine
+
+    Returns:
+        list: the (user_input, ai_output, attempts) entries that were not committed
+    """
+    engine = getattr(getattr(memory_system, "db_manager", None), "engine", None)
+    if ChatHistory is None or engine is None:
+        # No engine to batch on: record_conversation commits each turn itself
+        return [write for write in writes if not _write_conversation(memory_system, *write[:2])]
+
+    try:
+        chat_ids = _insert_chat_rows(engine, memory_system, writes)
+    except Exception as e:
+        # The transaction rolled back, so nothing in this batch was committed
+        logger.warning("[Memori] batched write failed: %s", e)
+        return list(writes)
+
+    # Long-term memory extraction still runs per turn, as record_conversation does
+    if getattr(memory_system, "memory_agent", None):
+        for chat_id, (user_input, ai_output, _) in zip(chat_ids, writes):
+            try:
+                memory_system._schedule_memory_processing(chat_id, user_input, ai_output, "unknown")
+            except Exception as e:
+                logger.warning("[Memori] failed to schedule memory processing: %s", e)
+    return []
+
+
+def _write_worker():
+    while True:
+        pending = _collect_writes()
+        try:
+            groups = {}
+            for memory_system, user_input, ai_output, attempts in pending:
+                groups.setdefault(id(memory_system), (memory_system, []))[1].append(
+                    (user_input, ai_output, attempts)
+                )
+            committed = 0
+            for memory_system, writes in groups.values():
+                failed = _write_batch(memory_system, writes)
+                committed += len(writes) - len(failed)
+                # Only the turns that didn't commit go back on the queue
+                for user_input, ai_output, attempts in failed:
+                    if attempts + 1 < _WRITE_MAX_ATTEMPTS:
+                        _enqueue_write((memory_system, user_input, ai_output, attempts + 1))
+                    else:
+                        logger.warning("[Memori] dropping conversation after %d failed writes", attempts + 1)
+            _write_stats["writes"] += committed
+            _write_stats["batches"] += len(groups)
+        finally:
+            for _ in pending:
+                _WRITE_QUEUE.task_done()
+
+
+def get_write_stats() -> dict:
+    """Background writer counters; batch_merge_rate is the share of writes merged into another"""
+    writes, batches = _write_stats["writes"], _write_stats["batches"]
+    merge_rate = (writes - batches) / writes if writes else 0.0
+    return {"writes": writes, "batches": batches, "batch_merge_rate": merge_rate}
+
+
+def _drain_writes(timeout: float = 2.0):
+    """Give queued writes a short grace period at interpreter exit"""
+    deadline = time.monotonic() + timeout
+    while _WRITE_QUEUE.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+threading.Thread(target=_write_worker, name="memori-writer", daemon=True).start()
+atexit.register(_drain_writes)
+
+
+@functools.singledispatch
+def _extract_user_text(input_data: Any) -> Optional[str]:
+    """Pull the latest user text out of an LLM input (None when there isn't one)"""
+    return None
+
+
+@_extract_user_text.register(str)
+def _(input_data: str) -> Optional[str]:
+    return input_data
+
+
+@_extract_user_text.register(list)
+def _(input_data: list) -> Optional[str]:
+    # Scan backwards for the last human message
+    for i in range(len(input_data) - 1, -1, -1):
+        msg = input_data[i]
+        if isinstance(msg, HumanMessage):
+            return msg.content
+        if isinstance(msg, dict) and msg.get("role") in ("user", "human"):
+            return msg.get("content")
+    return None
+
+
+@_extract_user_text.register(dict)
+def _(input_data: dict) -> Optional[str]:
+    return input_data.get("input")
+
+
+def _is_user_message(message: Any) -> bool:
+    if isinstance(message, HumanMessage):
+        return True
+    return isinstance(message, dict) and message.get("role") in ("user", "human")
+
+
+def _is_system_message(message: Any) -> bool:
+    if isinstance(message, SystemMessage):
+        return True
+    return isinstance(message, dict) and message.get("role") == "system"
+
+
+def _memory_insert_index(messages: List[Any]) -> int:
+    """Position for the memory message: before the last user turn, else after leading system messages"""
+    for i in range(len(messages) - 1, -1, -1):
+        if _is_user_message(messages[i]):
+            return i
+    index = 0
+    while index < len(messages) and _is_system_message(messages[index]):
+        index += 1
+    return index
+
+
 class MemoryLLMWrapper:
     """Wraps an LLM to consult Memori before generating and to record after.
 
@@ -37,13 +270,37 @@ class MemoryLLMWrapper:
       later sessions can benefit.
 
     The wrapper is defensive — errors in memory lookup/storage are logged
-    (printed) but do not prevent the LLM from running.
+    but do not prevent the LLM from running.
     """
 
+    # Attributes LangChain probes on every call; copied onto the instance so
+    # lookups don't fall through to __getattr__. Only bound methods and
+    # constants belong here: anything that can be reassigned later (like
+    # callbacks) must stay live on the wrapped LLM.
+    _FORWARDED_ATTRS = (
+        "bind", "bind_tools", "_llm_type", "with_structured_output", "stream",
+        "astream", "batch", "abatch", "get_num_tokens",
+    )
+
     def __init__(self, llm: Any, memory_system: Any, memory_tool: Any):
         self.llm = llm
         self.memory_system = memory_system
         self.memory_tool = memory_tool
+        # Hash of the last recorded turn; reruns often resubmit the same pair
+        self._last_hash: Optional[int] = None
+        for name in self._FORWARDED_ATTRS:
+            try:
+                object.__setattr__(self, name, getattr(llm, name))
+            except AttributeError:
+                pass
+
+    @property
+    def callbacks(self):
+        return getattr(self.llm, "callbacks", None)
+
+    @callbacks.setter
+    def callbacks(self, value):
+        self.llm.callbacks = value
 
     def _prepend_memories(self, messages: List[Any], query: str) -> List[Any]:
         try:
@@ -52,14 +309,7 @@ class MemoryLLMWrapper:
 
             # Query memori for relevant memories. Use a concise prompt so we
             # don't blow token usage while retrieving.
-            result = None
-            try:
-                # memory_tool may expose execute(query=...) like the example
-                result = self.memory_tool.execute(query=query)
-            except Exception:
-                # Fallback: try search attribute
-                if hasattr(self.memory_tool, "search"):
-                    result = self.memory_tool.search(query)
+            result = self._lookup_memories(query)
 
             if not result:
                 return messages
@@ -67,45 +317,69 @@ class MemoryLLMWrapper:
             # Build a short system-level summary to help the LLM.
             summary_text = f"Relevant memories:\n{result}" if isinstance(result, str) else f"Relevant memories: {str(result)}"
 
+            # Memories change every turn, so they go right before the latest
+            # user message: everything earlier stays a byte-identical prefix
+            # that provider-side prompt caching can reuse. Anything after it
+            # (tool calls and results of this turn) keeps its order.
+            if isinstance(messages, str):
+                messages = [HumanMessage(content=messages)]
+            index = _memory_insert_index(messages)
+            history, latest = messages[:index], messages[index:]
+
             # If langchain message classes are available, create a SystemMessage
             if SystemMessage is not None:
                 sys_msg = SystemMessage(content=summary_text)
-                return [sys_msg] + messages
+                return history + [sys_msg] + latest
 
-            # Otherwise, try to prepend a dict-style message or simple string.
+            # Otherwise, try to insert a dict-style message or simple string.
             # Many LLMs accept a list of dict messages as [{"role":"system", "content":"..."}, ...]
             if isinstance(messages, list) and messages and isinstance(messages[0], dict):
                 sys_dict = {"role": "system", "content": summary_text}
-                return [sys_dict] + messages
+                return history + [sys_dict] + latest
 
-            # As a last resort, insert the summary as the first element in messages
-            return [summary_text] + messages
+            # As a last resort, insert the summary as a plain element
+            return history + [summary_text] + latest
 
         except Exception as e:
-            print(f"[Memori] memory lookup failed: {e}")
+            logger.warning("[Memori] memory lookup failed: %s", e)
             return messages
 
-    def _record_conversation(self, user_input: str, ai_output: str):
+    def _raw_memory_lookup(self, query: str) -> Any:
+        result = None
         try:
-            if not self.memory_system:
-                return
+            # memory_tool may expose execute(query=...) like the example
+            result = self.memory_tool.execute(query=query)
+        except Exception:
+            # Fallback: try search attribute
+            if hasattr(self.memory_tool, "search"):
+                result = self.memory_tool.search(query)
+        return result
 
-            # Try known record method from example
-            if hasattr(self.memory_system, "record_conversation"):
-                self.memory_system.record_conversation(user_input=user_input, ai_output=ai_output)
-                return
+    def _lookup_memories(self, query: str) -> Any:
+        """Memoized memory search; repeated prompts skip the database for a few minutes"""
+        query_norm = query.strip().lower()[:256]
+        key = (id(self.memory_tool), query_norm)
+        with _memory_lookup_lock:
+            if key in _memory_lookup_cache:
+                return _memory_lookup_cache[key]
 
-            # Try generic store/ingest methods
-            if hasattr(self.memory_system, "ingest"):
-                self.memory_system.ingest({"user_input": user_input, "ai_output": ai_output})
-                return
+        result = self._raw_memory_lookup(query_norm)
 
-            if hasattr(self.memory_system, "record"):
-                self.memory_system.record({"user_input": user_input, "ai_output": ai_output})
-                return
+        # Don't let a few huge results crowd out the cache
+        if len(str(result)) <= _MEMORY_CACHE_MAX_CHARS:
+            with _memory_lookup_lock:
+                _memory_lookup_cache[key] = result
+        return result
 
-        except Exception as e:
-            print(f"[Memori] failed to record conversation: {e}")
+    def _record_conversation(self, user_input: str, ai_output: str):
+        """Queue the turn for the background writer so the response isn't held up"""
+        if not self.memory_system or not user_input.strip() or not ai_output.strip():
+            return
+        turn_hash = hash((user_input, ai_output[:1024]))
+        if turn_hash == self._last_hash:
+            return
+        _enqueue_write((self.memory_system, user_input, ai_output, 0))
+        self._last_hash = turn_hash
 
     # Delegate attribute access
     def __getattr__(self, name: str):
@@ -114,24 +388,7 @@ class MemoryLLMWrapper:
     # Support invoke-style API used across the project
     def invoke(self, input_data: Any, config: Optional[Any] = None, **kwargs) -> Any:
         # Try to extract a short user query for memory lookup
-        user_text = None
-        try:
-            if isinstance(input_data, str):
-                user_text = input_data
-            elif isinstance(input_data, list):
-                # find last human message
-                for msg in reversed(input_data):
-                    if isinstance(msg, dict) and msg.get("role") in ("user", "human"):
-                        user_text = msg.get("content")
-                        break
-                    if HumanMessage is not None and isinstance(msg, HumanMessage):
-                        user_text = msg.content
-                        break
-            elif isinstance(input_data, dict):
-                if "input" in input_data:
-                    user_text = input_data["input"]
-        except Exception:
-            user_text = None
+        user_text = _extract_user_text(input_data)
 
         # Prepend memories
         messages_for_llm = input_data
@@ -183,13 +440,16 @@ class MemoryLLMWrapper:
         return result
 
 
+@functools.lru_cache(maxsize=4)
 def init_memori(database_connect: Optional[str] = None, namespace: str = "langgraphagenticai", conscious_ingest: bool = True, verbose: bool = False):
     """Initialize Memori and return (memory_system, memory_tool).
 
+    Instances are reused per argument set, so Streamlit reruns share one
+    Memori (and its lookup cache) instead of re-enabling a new one each time.
     If Memori is not available (not installed), returns (None, None).
     """
     if Memori is None or create_memory_tool is None:
-        print("[Memori] memorisdk not installed; skipping memory initialization")
+        logger.info("[Memori] memorisdk not installed; skipping memory initialization")
         return None, None
 
     try:
@@ -202,10 +462,10 @@ def init_memori(database_connect: Optional[str] = None, namespace: str = "langgr
         )
         memory_system.enable()
         memory_tool = create_memory_tool(memory_system)
-        print(f"[Memori] initialized with namespace={namespace} db={db_connect}")
+        logger.info("[Memori] initialized with namespace=%s db=%s", namespace, db_connect)
         return memory_system, memory_tool
     except Exception as e:
-        print(f"[Memori] failed to initialize Memori: {e}")
+        logger.warning("[Memori] failed to initialize Memori: %s", e)
         return None, None
 
 
@@ -4,22 +4,35 @@ Shows LLM usage statistics and costs in Streamlit
 """
 import streamlit as st
 import os
+import secrets
 from typing import Dict, Any, List
-from datetime import datetime, timedelta
-from .langfuse_integration import langfuse_manager
+from .langfuse_integration import get_langfuse_manager, is_langfuse_ready, submit_interaction
+
+
+def _langfuse_enabled() -> bool:
+    """Langfuse availability, checked once per session (the sidebar renders every rerun)"""
+    enabled = st.session_state.get("_lf_enabled")
+    if enabled is None:
+        # Still warming up in the background: skip monitoring, decide later
+        if not is_langfuse_ready():
+            return False
+        enabled = st.session_state.setdefault(
+            "_lf_enabled", get_langfuse_manager().is_enabled()
+        )
+    return enabled
 
 
 def show_monitoring_dashboard():
     """Display monitoring dashboard in Streamlit sidebar"""
     try:
-        if not langfuse_manager.is_enabled():
+        if not _langfuse_enabled():
             return
         
         with st.sidebar:
             st.subheader("📊 LLM Monitoring")
             
             # Dashboard link
-            dashboard_url = langfuse_manager.get_dashboard_url()
+            dashboard_url = get_langfuse_manager().get_dashboard_url()
             st.markdown(f"[📈 Open Langfuse Dashboard]({dashboard_url})")
             
             # Quick stats (if available)
@@ -40,45 +53,21 @@ def show_monitoring_dashboard():
 
 def create_session_id() -> str:
     """Create a unique session ID for tracking"""
-    if "session_id" not in st.session_state:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        st.session_state.session_id = f"session_{timestamp}"
-    
-    return st.session_state.session_id
+    session_id = st.session_state.get("session_id")
+    if session_id is None:
+        session_id = st.session_state.setdefault("session_id", f"session_{secrets.token_hex(8)}")
+    return session_id
 
 
 def log_user_interaction(usecase: str, user_message: str, response: str):
     """Log user interaction for monitoring - fails silently if monitoring unavailable"""
     try:
-        if not langfuse_manager.is_enabled():
+        if not _langfuse_enabled():
             return
         
-        session_id = create_session_id()
-        
-        # Create trace for this interaction
-        trace = langfuse_manager.create_trace(
-            name=f"chat_interaction_{usecase}",
-            session_id=session_id,
-            user_id="streamlit_user",
-            metadata={
-                "usecase": usecase,
-                "timestamp": datetime.now().isoformat()
-            }
-        )
-        
-        if trace:
-            # Log the generation
-            langfuse_manager.log_generation(
-                trace_id=trace.id,
-                model="groq_llm",
-                input_text=user_message,
-                output_text=response,
-                metadata={
-                    "usecase": usecase,
-                    "session_id": session_id
-                }
-            )
-            
+        # Export happens on a background thread; nothing here waits on the network
+        submit_interaction(usecase, user_message, response, create_session_id())
+
     except Exception:
         # Silently fail - logging should never break the app
         pass
@@ -87,7 +76,7 @@ def log_user_interaction(usecase: str, user_message: str, response: str):
 def show_cost_tracking():
     """Show cost tracking information"""
     try:
-        if not langfuse_manager.is_enabled():
+        if not _langfuse_enabled():
             return
         
         st.info("💰 Cost tracking is enabled via Langfuse. View detailed costs in the dashboard.")
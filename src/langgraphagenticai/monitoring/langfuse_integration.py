@@ -1,13 +1,23 @@
 """
 Langfuse Integration for LLM Monitoring and Cost Tracking
 """
+import atexit
+import hashlib
+import logging
 import os
-from typing import Optional, Any
-import streamlit as st
+import queue
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Any, Tuple
 from langfuse import Langfuse
 from langfuse.langchain import CallbackHandler
 from langchain.callbacks.base import BaseCallbackHandler
 
+logger = logging.getLogger(__name__)
+
 
 class LangfuseManager:
     """Manages Langfuse connection and monitoring"""
@@ -15,6 +25,17 @@ class LangfuseManager:
     def __init__(self):
         self.langfuse = None
         self.callback_handler = None
+        # Export records, drained by one daemon thread: up to flush_at per
+        # batch, waiting at most flush_interval, then a single flush()
+        self._q: "queue.Queue" = queue.Queue(maxsize=1024)
+        self._flush_at = int(os.getenv("LANGFUSE_FLUSH_AT", "100"))
+        self._flush_interval = float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "5.0"))
+        # Fraction of traces kept; the decision for the current trace is kept
+        # per thread so its generations follow it
+        self._sample_rate = float(os.getenv("LANGFUSE_SAMPLE_RATE", "1.0"))
+        self._local = threading.local()
+        # Cap on input/output characters per record; huge payloads fail ingestion
+        self._max_io = int(os.getenv("LANGFUSE_MAX_IO_SIZE", "100000"))
         self._initialize_langfuse()
     
     def _initialize_langfuse(self):
@@ -33,23 +54,61 @@ class LangfuseManager:
                 secret_key=secret_key,
                 public_key=public_key,
                 host=host,
+                # Batch events and export them from the SDK's background thread
+                flush_at=self._flush_at,
+                flush_interval=self._flush_interval,
             )
             
-            # Create callback handler for LangChain integration
-            self.callback_handler = CallbackHandler(
-                secret_key=secret_key,
-                public_key=public_key,
-                host=host,
-            )
+            # Optionally verify credentials up front; bad keys disable monitoring
+            if os.getenv("LANGFUSE_AUTH_CHECK", "false").lower() == "true":
+                if not self._auth_check(secret_key, host):
+                    self.langfuse = None
+                    return
+            
+            # Create callback handler for LangChain integration; in v3 it
+            # reuses the client registered above for this public key
+            self.callback_handler = CallbackHandler(public_key=public_key)
             
+            # Only once the client and handler exist: send whatever is still
+            # buffered when the process exits; atexit runs in reverse order,
+            # so the queue drains before the flush
+            atexit.register(self.langfuse.flush)
+            atexit.register(self._drain_pending)
+            threading.Thread(target=self._drain, name="langfuse-export", daemon=True).start()
                 
         except Exception as e:
             # Any initialization error should not break the app
             self.langfuse = None
             self.callback_handler = None
-            # Only log in development mode
+            # Runs on the warm-up thread, where st.* calls are dropped; log instead
             if os.getenv("STREAMLIT_ENV") != "production":
-                st.info("ℹ️ Langfuse monitoring not available")
+                logger.info("Langfuse monitoring not available: %s", e)
+    
+    def _auth_check(self, secret_key: str, host: str) -> bool:
+        """Run langfuse.auth_check(), trusting a recent success recorded on disk"""
+        digest = hashlib.sha256(f"{secret_key}\x00{host}".encode("utf-8")).hexdigest()[:16]
+        marker = os.path.join(tempfile.gettempdir(), f".langfuse-auth-ok-{digest}")
+        ttl = float(os.getenv("LANGFUSE_AUTH_CACHE_TTL", "300"))
+        try:
+            if time.time() - os.path.getmtime(marker) < ttl:
+                return True
+        except OSError:
+            pass
+
+        try:
+            ok = bool(self.langfuse.auth_check())
+        except Exception:
+            ok = False
+
+        try:
+            if ok:
+                with open(marker, "a"):
+                    os.utime(marker, None)
+            else:
+                os.unlink(marker)
+        except OSError:
+            pass
+        return ok
     
     def get_callback_handler(self) -> Optional[BaseCallbackHandler]:
         """Get the Langfuse callback handler for LangChain"""
@@ -61,70 +120,206 @@ class LangfuseManager:
     
     def create_trace(self, name: str, user_id: Optional[str] = None, 
                     session_id: Optional[str] = None, **kwargs) -> Optional[Any]:
-        """Create a new trace for monitoring"""
+        """Create a new trace for monitoring (None when sampled out)"""
         if not self.langfuse:
             return None
+
+        self._local.sampled = self._sample()
+        if not self._local.sampled:
+            return None
             
         try:
-            return self.langfuse.trace(
-                name=name,
-                user_id=user_id,
-                session_id=session_id,
-                **kwargs
-            )
+            # Langfuse v3: a root span carries the trace attributes
+            span = self.langfuse.start_span(name=name)
+            span.update_trace(name=name, user_id=user_id, session_id=session_id, **kwargs)
+            return span
         except Exception:
             # Silently fail - monitoring should never break the app
             return None
     
     def log_generation(self, trace_id: str, model: str, input_text: str, 
                       output_text: str, **kwargs):
-        """Log a generation event"""
+        """Queue a generation event for background export"""
         if not self.langfuse:
             return
-            
+
+        # Follow the decision made for this thread's trace, if there was one
+        sampled = getattr(self._local, "sampled", None)
+        if not (self._sample() if sampled is None else sampled):
+            return
+
+        self._enqueue(("generation", dict(
+            trace_id=trace_id,
+            name="llm_generation",
+            model=model,
+            input=self._truncate(input_text, self._max_io),
+            output=self._truncate(output_text, self._max_io),
+            **kwargs
+        )))
+
+    def submit_interaction(self, usecase: str, user_message: str, response: str, session_id: str):
+        """Queue a user interaction (trace + generation) for background export"""
+        if not self.langfuse or not self._sample():
+            return
+
+        self._enqueue(("interaction", (
+            usecase,
+            self._truncate(user_message, self._max_io),
+            self._truncate(response, self._max_io),
+            session_id,
+            time.time(),
+        )))
+
+    @staticmethod
+    def _truncate(text: Any, limit: int) -> Any:
+        if not isinstance(text, str) or len(text) <= limit:
+            return text
+        return text[:limit] + f"...[truncated {len(text) - limit} chars]"
+
+    def _sample(self) -> bool:
+        return self._sample_rate >= 1.0 or random.random() < self._sample_rate
+
+    def _enqueue(self, record: Tuple[str, Any]):
         try:
-            self.langfuse.generation(
-                trace_id=trace_id,
-                name="llm_generation",
-                model=model,
-                input=input_text,
-                output=output_text,
-                **kwargs
-            )
-        except Exception:
-            # Silently fail - monitoring should never break the app
+            self._q.put_nowait(record)
+        except queue.Full:
+            # Dropping a monitoring record beats blocking the request
             pass
-    
+
+    def _send_interaction(self, usecase: str, user_message: str, response: str,
+                          session_id: str, timestamp: float):
+        trace_kwargs = {
+            "name": f"chat_interaction_{usecase}",
+            "user_id": "streamlit_user",
+            "session_id": session_id,
+            "metadata": {
+                "usecase": usecase,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(timespec="seconds"),
+            },
+        }
+        generation_kwargs = {
+            "name": "llm_generation",
+            "model": "groq_llm",
+            "input": user_message,
+            "output": response,
+            "metadata": {"usecase": usecase, "session_id": session_id},
+        }
+        # Langfuse v3: a root span carries the trace attributes
+        span = self.langfuse.start_span(name=trace_kwargs["name"])
+        span.update_trace(**trace_kwargs)
+        span.start_generation(**generation_kwargs).end()
+        span.end()
+
+    def _send_generation(self, trace_id: Optional[str] = None, **generation_kwargs):
+        # Langfuse v3 attaches observations to an existing trace via trace_context
+        trace_context = {"trace_id": trace_id} if trace_id else None
+        self.langfuse.start_generation(trace_context=trace_context, **generation_kwargs).end()
+
+    def _collect(self) -> List[Tuple[str, Any]]:
+        records = [self._q.get()]
+        deadline = time.monotonic() + self._flush_interval
+        while len(records) < self._flush_at:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                records.append(self._q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return records
+
+    def _drain(self):
+        while True:
+            records = self._collect()
+            try:
+                for kind, payload in records:
+                    try:
+                        if kind == "interaction":
+                            self._send_interaction(*payload)
+                        else:
+                            self._send_generation(**payload)
+                    except Exception:
+                        # Silently fail - monitoring should never break the app
+                        pass
+                try:
+                    self.langfuse.flush()
+                except Exception:
+                    pass
+            finally:
+                for _ in records:
+                    self._q.task_done()
+
+    def _drain_pending(self, timeout: float = 2.0):
+        """Give queued records a short grace period at interpreter exit"""
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
     def get_dashboard_url(self) -> str:
         """Get the Langfuse dashboard URL"""
         host = os.getenv("LANGFUSE_HOST", "http://localhost:3000")
         return f"{host}/project/default"
 
 
-# Global instance
-langfuse_manager = LangfuseManager()
+_manager: Optional[LangfuseManager] = None
+_manager_lock = threading.Lock()
+_manager_ready = threading.Event()
+
+
+def get_langfuse_manager() -> LangfuseManager:
+    """Shared LangfuseManager; blocks only if it is still being created"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = LangfuseManager()
+                _manager_ready.set()
+    return _manager
+
+
+def is_langfuse_ready() -> bool:
+    """Whether the background warm-up has finished creating the manager"""
+    return _manager_ready.is_set()
+
+
+def is_langfuse_enabled() -> bool:
+    """Non-blocking check for the request path: False until the client is warm"""
+    return _manager_ready.is_set() and get_langfuse_manager().is_enabled()
+
+
+# Build the Langfuse client and callback handler (httpx clients, exporter
+# threads) in the background so the first request doesn't wait for them
+threading.Thread(target=get_langfuse_manager, name="langfuse-warmup", daemon=True).start()
+
+
+def submit_interaction(usecase: str, user_message: str, response: str, session_id: str):
+    """Queue an interaction for background export; never blocks on the network"""
+    get_langfuse_manager().submit_interaction(usecase, user_message, response, session_id)
 
 
 def get_langfuse_callbacks():
     """Get Langfuse callbacks for LangChain integration"""
-    if langfuse_manager.is_enabled():
-        return [langfuse_manager.get_callback_handler()]
+    if is_langfuse_enabled():
+        return [get_langfuse_manager().get_callback_handler()]
     return []
 
 
 def create_monitored_llm(llm, session_id: Optional[str] = None):
     """Wrap an LLM with Langfuse monitoring - gracefully falls back if monitoring unavailable"""
     try:
-        if not langfuse_manager.is_enabled():
+        if not is_langfuse_enabled():
             return llm
         
         # Add Langfuse callback to the LLM
         callbacks = get_langfuse_callbacks()
         if callbacks:
-            # Create a new LLM instance with callbacks
-            llm_with_callbacks = llm.__class__(**llm.__dict__)
-            llm_with_callbacks.callbacks = callbacks
-            return llm_with_callbacks
+            # Attach in place: rebuilding the LLM from __dict__ re-ran model
+            # validation, and wrappers (Memori/Guardrails) can't be rebuilt
+            # that way. Already-attached handlers are not added twice.
+            existing = list(getattr(llm, "callbacks", None) or [])
+            missing = [cb for cb in callbacks if cb not in existing]
+            if missing:
+                llm.callbacks = existing + missing
         
         return llm
     except Exception:
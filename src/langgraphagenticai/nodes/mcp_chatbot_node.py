@@ -4,6 +4,7 @@ Handles chatbot logic with MCP tools integration
 """
 from src.langgraphagenticai.state.state import State
 from typing import List, Any
+from langchain_core.runnables import RunnableLambda
 
 
 class MCPChatbotNode:
@@ -25,4 +26,10 @@ class MCPChatbotNode:
             """
             return {"messages": [llm_with_tools.invoke(state["messages"])]}
 
-        return chatbot_node
\ No newline at end of file
+        async def achatbot_node(state: State):
+            """
+            Async variant used when the graph runs via ainvoke/astream
+            """
+            return {"messages": [await llm_with_tools.ainvoke(state["messages"])]}
+
+        return RunnableLambda(chatbot_node, afunc=achatbot_node, name="chatbot_node")
\ No newline at end of file
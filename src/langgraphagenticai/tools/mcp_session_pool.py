@@ -0,0 +1,224 @@
+"""
+MCP Session Pool
+Keeps MCP server subprocesses alive between tool calls. Each session does the
+MCP initialize handshake once, then every call is one JSON-RPC 2.0 request
+matched to its reply by id, instead of a fresh fork+exec, startup and handshake
+"""
+import atexit
+import itertools
+import json
+import os
+import select
+import subprocess
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Protocol revision offered during initialize; servers answer with the one they speak
+MCP_PROTOCOL_VERSION = "2025-06-18"
+# Only the tail of a server's stderr is kept, for error messages
+_STDERR_TAIL_BYTES = 4096
+# Longest message line accepted before the session is abandoned
+_MAX_RESPONSE_BYTES = int(os.getenv("MCP_MAX_RESPONSE_BYTES", str(16 * 1024 * 1024)))
+
+
+def _dumps(message: Dict[str, Any]) -> bytes:
+    return orjson.dumps(message) if orjson is not None else json.dumps(message).encode("utf-8")
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by an MCP server"""
+
+
+class MCPSession:
+    """One long-lived, initialized MCP server process spoken to over stdin/stdout"""
+
+    def __init__(self, key: Hashable, argv: List[str], env: Dict[str, str], timeout: float = 30):
+        self.key = key
+        self.proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        self.created_at = self.last_used = time.monotonic()
+        self._buffer = b""
+        self._ids = itertools.count(1)
+        # stderr must be drained or a chatty server blocks on a full pipe
+        self._stderr_tail = bytearray()
+        self._stderr_lock = threading.Lock()
+        threading.Thread(target=self._drain_stderr, name="mcp-stderr", daemon=True).start()
+
+        try:
+            self.server_info = self.call("initialize", {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "langgraphagenticai", "version": "1.0"},
+            }, timeout)
+            self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        except Exception:
+            self.close()
+            raise
+
+    def _drain_stderr(self):
+        try:
+            for chunk in iter(lambda: self.proc.stderr.read1(4096), b""):
+                with self._stderr_lock:
+                    self._stderr_tail += chunk
+                    del self._stderr_tail[:-_STDERR_TAIL_BYTES]
+        except Exception:
+            pass
+
+    def stderr_tail(self) -> str:
+        """Last few KB the server wrote to stderr"""
+        with self._stderr_lock:
+            return self._stderr_tail.decode("utf-8", errors="replace")
+
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _send(self, message: Dict[str, Any]):
+        self.proc.stdin.write(_dumps(message) + b"\n")
+        self.proc.stdin.flush()
+
+    def _read_line(self, deadline: float, timeout: float) -> bytes:
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"MCP server did not respond within {timeout}s")
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError(f"MCP server exited (code {self.proc.poll()})")
+            self._buffer += chunk
+            if len(self._buffer) > _MAX_RESPONSE_BYTES:
+                raise ValueError(f"MCP response exceeded {_MAX_RESPONSE_BYTES} bytes")
+
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line
+
+    def call(self, method: str, params: Optional[Dict[str, Any]], timeout: float) -> Any:
+        """Send a JSON-RPC request and return the result of the reply with the same id"""
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        self._send(message)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            line = self._read_line(deadline, timeout).strip()
+            if not line:
+                continue
+            try:
+                reply = _loads(line)
+            except ValueError:
+                # Servers may log non-JSON lines to stdout; they aren't replies
+                continue
+            if not isinstance(reply, dict):
+                continue
+
+            if "method" in reply:
+                # Server-initiated: notifications need no answer, requests do
+                if "id" in reply:
+                    if reply["method"] == "ping":
+                        self._send({"jsonrpc": "2.0", "id": reply["id"], "result": {}})
+                    else:
+                        self._send({"jsonrpc": "2.0", "id": reply["id"], "error": {
+                            "code": -32601, "message": f"Method not supported: {reply['method']}",
+                        }})
+                continue
+
+            if reply.get("id") != request_id:
+                continue
+
+            self.last_used = time.monotonic()
+            if "error" in reply:
+                error = reply["error"] or {}
+                raise MCPError(error.get("message", str(error)))
+            return reply.get("result")
+
+    def close(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """Idle MCP sessions per (command, args, env) key, with idle and lifetime eviction"""
+
+    def __init__(self, idle_timeout: float = 300, max_lifetime: float = 3600, max_idle_per_key: int = 4):
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[Hashable, List[MCPSession]] = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, session: MCPSession, now: float) -> bool:
+        return (
+            not session.is_alive()
+            or now - session.last_used > self.idle_timeout
+            or now - session.created_at > self.max_lifetime
+        )
+
+    def acquire(self, key: Hashable, argv: List[str], env: Dict[str, str], timeout: float = 30) -> MCPSession:
+        """Check out an idle session for key, spawning (and initializing) one if none is usable"""
+        now = time.monotonic()
+        stale = []
+        session: Optional[MCPSession] = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                if self._expired(candidate, now):
+                    stale.append(candidate)
+                else:
+                    session = candidate
+                    break
+        for candidate in stale:
+            candidate.close()
+        return session or MCPSession(key, argv, env, timeout)
+
+    def release(self, session: MCPSession, healthy: bool = True):
+        """Return a session after use; unhealthy or surplus sessions are closed"""
+        if healthy and not self._expired(session, time.monotonic()):
+            with self._lock:
+                idle = self._idle.setdefault(session.key, [])
+                if len(idle) < self.max_idle_per_key:
+                    idle.append(session)
+                    return
+        session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+
+
+_session_pool = MCPSessionPool(
+    idle_timeout=float(os.getenv("MCP_SESSION_IDLE_TIMEOUT", "300")),
+    max_lifetime=float(os.getenv("MCP_SESSION_MAX_LIFETIME", "3600")),
+)
+atexit.register(_session_pool.close_all)
+
+
+def get_session_pool() -> MCPSessionPool:
+    """Return the process-wide MCP session pool"""
+    return _session_pool
@@ -4,13 +4,34 @@ Handles MCP server connections and tool creation for LangGraph
 """
 import json
 import asyncio
-import subprocess
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import streamlit as st
 from langchain.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 import tempfile
 import os
+from .mcp_session_pool import MCPError, get_session_pool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(text: str) -> Any:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def _format_tool_result(result: Any) -> str:
+    """Flatten a tools/call result into the text the model sees"""
+    if not isinstance(result, dict):
+        return str(result)
+    parts = [
+        item.get("text", "") if item.get("type") == "text" else json.dumps(item)
+        for item in result.get("content", [])
+    ]
+    text = "\n".join(parts)
+    return f"Error: {text}" if result.get("isError") else text
 
 
 class MCPTool(BaseTool):
@@ -20,41 +41,51 @@ class MCPTool(BaseTool):
     mcp_command: str = Field(...)
     mcp_args: List[str] = Field(default_factory=list)
     mcp_env: Dict[str, str] = Field(default_factory=dict)
+    # Name of the tool on the MCP server; defaults to this tool's name
+    mcp_tool_name: Optional[str] = None
+    # Built once per tool rather than on every call
+    _merged_env: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _session_key: tuple = PrivateAttr(default=())
+    
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._merged_env = {**os.environ, **self.mcp_env}
+        self._session_key = (self.mcp_command, tuple(self.mcp_args), tuple(sorted(self.mcp_env.items())))
     
     def _run(self, query: str) -> str:
         """Execute the MCP tool"""
         try:
-            # Set up environment
-            env = os.environ.copy()
-            env.update(self.mcp_env)
-            
-            # Create a simple input for the MCP server
-            input_data = {
-                "method": "tools/call",
-                "params": {
-                    "name": self.name,
-                    "arguments": {"query": query}
-                }
+            params = {
+                "name": self.mcp_tool_name or self.name,
+                "arguments": {"query": query}
             }
             
-            # Run the MCP server command
-            result = subprocess.run(
-                [self.mcp_command] + self.mcp_args,
-                input=json.dumps(input_data),
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                return f"Error: {result.stderr}"
+            # Reuse a running, already initialized server for this command/args/env
+            pool = get_session_pool()
+            session = pool.acquire(self._session_key, [self.mcp_command] + self.mcp_args, self._merged_env)
+            healthy = False
+            try:
+                result = session.call("tools/call", params, timeout=30)
+                healthy = True
+                return _format_tool_result(result)
+            except MCPError as e:
+                # The server answered; the session is still usable
+                healthy = True
+                return f"Error: {e}"
+            except (TimeoutError, EOFError) as e:
+                return f"Error: {session.stderr_tail() or e}"
+            finally:
+                pool.release(session, healthy)
                 
         except Exception as e:
             return f"Error executing MCP tool: {str(e)}"
 
+    async def _arun(self, query: str) -> str:
+        """Execute the MCP tool without blocking the event loop"""
+        # Pooled sessions talk over blocking pipes, so each call gets a worker
+        # thread; ToolNode gathers concurrent calls, so N calls cost max(t_i)
+        return await asyncio.to_thread(self._run, query)
+
 
 def create_mcp_tools_from_config(mcp_config: Dict[str, Any]) -> List[MCPTool]:
     """Create MCP tools from configuration"""
@@ -83,59 +114,69 @@ def create_mcp_tools_from_config(mcp_config: Dict[str, Any]) -> List[MCPTool]:
     return tools
 
 
-def validate_mcp_config(config_text: str) -> Optional[Dict[str, Any]]:
-    """Validate MCP configuration JSON"""
+@st.cache_data(show_spinner=False, max_entries=32)
+def _validate_mcp_config_pure(config_text: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Parse and validate MCP configuration JSON, returning (config, error message)"""
     try:
-        config = json.loads(config_text)
+        config = _json_loads(config_text)
         
         # Basic validation
         if "mcpServers" not in config:
-            st.error("MCP config must contain 'mcpServers' key")
-            return None
+            return None, "MCP config must contain 'mcpServers' key"
             
         # Validate each server config
         for server_name, server_config in config["mcpServers"].items():
             if "command" not in server_config:
-                st.error(f"Server '{server_name}' must have 'command' field")
-                return None
+                return None, f"Server '{server_name}' must have 'command' field"
                 
-        return config
+        return config, None
         
     except json.JSONDecodeError as e:
-        st.error(f"Invalid JSON: {e}")
-        return None
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return None, f"Invalid JSON: {e}"
     except Exception as e:
-        st.error(f"Error validating config: {e}")
-        return None
+        return None, f"Error validating config: {e}"
 
 
-def get_sample_mcp_config() -> str:
-    """Get a sample MCP configuration"""
-    return json.dumps({
-        "mcpServers": {
-            "filesystem": {
-                "command": "uvx",
-                "args": ["mcp-server-filesystem", "/tmp"],
-                "disabled": False,
-                "autoApprove": [],
-                "disabledTools": []
-            },
-            "brave-search": {
-                "command": "uvx",
-                "args": ["mcp-server-brave-search"],
-                "env": {
-                    "BRAVE_API_KEY": "your_brave_api_key_here"
-                },
-                "disabled": True,
-                "autoApprove": [],
-                "disabledTools": []
+def validate_mcp_config(config_text: str) -> Optional[Dict[str, Any]]:
+    """Validate MCP configuration JSON (results are cached per text)"""
+    config, error = _validate_mcp_config_pure(config_text)
+    if error:
+        st.error(error)
+    return config
+
+
+# Static sample shown by the "Load Sample Config" button, serialized once
+_SAMPLE_MCP_CONFIG_JSON = json.dumps({
+    "mcpServers": {
+        "filesystem": {
+            "command": "uvx",
+            "args": ["mcp-server-filesystem", "/tmp"],
+            "disabled": False,
+            "autoApprove": [],
+            "disabledTools": []
+        },
+        "brave-search": {
+            "command": "uvx",
+            "args": ["mcp-server-brave-search"],
+            "env": {
+                "BRAVE_API_KEY": "your_brave_api_key_here"
             },
-            "sqlite": {
-                "command": "uvx",
-                "args": ["mcp-server-sqlite", "--db-path", "/tmp/test.db"],
-                "disabled": False,
-                "autoApprove": [],
-                "disabledTools": []
-            }
+            "disabled": True,
+            "autoApprove": [],
+            "disabledTools": []
+        },
+        "sqlite": {
+            "command": "uvx",
+            "args": ["mcp-server-sqlite", "--db-path", "/tmp/test.db"],
+            "disabled": False,
+            "autoApprove": [],
+            "disabledTools": []
         }
-    }, indent=2)
\ No newline at end of file
+    }
+}, indent=2)
+
+
+def get_sample_mcp_config() -> str:
+    """Get a sample MCP configuration"""
+    return _SAMPLE_MCP_CONFIG_JSON
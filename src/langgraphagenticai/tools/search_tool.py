@@ -1,20 +1,34 @@
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langgraph.prebuilt import ToolNode
+import functools
 import os
 
+
+@functools.lru_cache(maxsize=4)
+def _create_tools(tavily_api_key: str):
+    """
+    Build the search tools once per API key
+    """
+    return (TavilySearchResults(max_results=2),)
+
+
 def get_tools():
     """
     Return the list of tools to be used in the chatbot
     """
     # Check if TAVILY_API_KEY is set
-    if not os.getenv("TAVILY_API_KEY"):
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+    if not tavily_api_key:
         raise ValueError("TAVILY_API_KEY environment variable is not set")
     
-    tool = TavilySearchResults(max_results=2)
-    return [tool]
+    return list(_create_tools(tavily_api_key))
 
 def create_tool_node(tools):
     """
     Creates and return tool node for the graph
+
+    ToolNode executes every tool call of a single AI message concurrently
+    (a thread pool for sync runs, asyncio.gather for async runs), so a turn
+    with N independent calls costs the slowest call rather than the sum.
     """
     return ToolNode(tools=tools)
\ No newline at end of file
@@ -10,83 +10,126 @@ class DisplayResultStremlit:
         self.user_message = user_message
 
     def display_result_on_ui(self):
+        handler = self.HANDLERS.get(self.usecase)
+        if handler is not None:
+            handler(self)
+
+    def _display_basic(self):
+        """Basic Chatbot: single LLM node, no tools"""
         usecase = self.usecase
         graph = self.graph
         user_message = self.user_message
-        if usecase == "Basic Chatbot":
-            for event in graph.stream({"messages": ("user", user_message)}):
-                print(event.values())
-                for value in event.values():
-                    print(value["messages"])
-                    with st.chat_message("user"):
-                        st.write(user_message)
-                    with st.chat_message("assisstant"):
-                        st.write(value["messages"].content)
-                        
-                        # Log interaction for monitoring - fail silently if monitoring unavailable
-                        try:
-                            log_user_interaction(
-                                usecase=usecase,
-                                user_message=user_message,
-                                response=value["messages"].content
-                            )
-                        except Exception:
-                            pass
 
-        elif usecase == "Chatbot with Tool" or usecase == "AI News" or usecase == "MCP Chatbot":
-            # Prepare state and invoke the graph
-            initial_state = {"messages": [HumanMessage(content=user_message)]}
-            
-            # Display user message
-            with st.chat_message("user"):
-                st.write(user_message)
-            
-            # Stream the graph execution
-            for event in graph.stream(initial_state):
-                for node_name, node_output in event.items():
-                    if "messages" in node_output:
-                        messages = node_output["messages"]
-                        if not isinstance(messages, list):
-                            messages = [messages]
-                        
-                        for message in messages:
-                            if isinstance(message, ToolMessage):
-                                with st.chat_message("assistant"):
-                                    if usecase == "MCP Chatbot":
-                                        st.write("🔧 **MCP Tool Results:**")
-                                    else:
-                                        st.write("🔍 **Tool Search Results:**")
-                                    st.write(message.content)
-                            elif isinstance(message, AIMessage):
-                                if message.tool_calls:
-                                    with st.chat_message("assistant"):
-                                        if usecase == "MCP Chatbot":
-                                            st.write("🚀 **Calling MCP tool...**")
-                                        else:
-                                            st.write("🔧 **Calling search tool...**")
-                                        for tool_call in message.tool_calls:
-                                            st.write(f"Tool: {tool_call.get('name', 'Unknown')}")
-                                            st.write(f"Query: {tool_call['args'].get('query', 'N/A')}")
-                                else:
-                                    with st.chat_message("assistant"):
-                                        st.write(message.content)
-                                        
-                                        # Log interaction for monitoring - fail silently if monitoring unavailable
-                                        try:
-                                            log_user_interaction(
-                                                usecase=usecase,
-                                                user_message=user_message,
-                                                response=message.content
-                                            )
-                                        except Exception:
-                                            pass
+        # Single-node graph: one invoke instead of walking stream events
+        with st.chat_message("user"):
+            st.write(user_message)
+
+        result = graph.invoke({"messages": ("user", user_message)})
+        response = result["messages"][-1].content
+        with st.chat_message("assisstant"):
+            st.write(response)
             
-            # Show safety and monitoring info
+            # Log interaction for monitoring - fail silently if monitoring unavailable
             try:
-                show_cost_tracking()
-                self._show_safety_info()
+                log_user_interaction(
+                    usecase=usecase,
+                    user_message=user_message,
+                    response=response
+                )
             except Exception:
                 pass
+
+    def _display_with_tools(self):
+        """Tool-calling usecases: stream the graph, rendering tool calls and results"""
+        graph = self.graph
+        user_message = self.user_message
+
+        # Prepare state and invoke the graph
+        initial_state = {"messages": [HumanMessage(content=user_message)]}
+        
+        # Display user message
+        with st.chat_message("user"):
+            st.write(user_message)
+        
+        # Stream the graph execution
+        for event in graph.stream(initial_state):
+            for node_name, node_output in event.items():
+                if "messages" in node_output:
+                    messages = node_output["messages"]
+                    if not isinstance(messages, list):
+                        messages = [messages]
+                    
+                    for message in messages:
+                        message_type = type(message)
+                        if message_type in self._RENDERERS:
+                            renderer = self._RENDERERS[message_type]
+                        else:
+                            renderer = self._resolve_renderer(message_type)
+                        if renderer is not None:
+                            renderer(self, message)
+        
+        # Show safety and monitoring info
+        try:
+            show_cost_tracking()
+            self._show_safety_info()
+        except Exception:
+            pass
+
+    def _render_tool_message(self, message):
+        with st.chat_message("assistant"):
+            if self.usecase == "MCP Chatbot":
+                st.write("🔧 **MCP Tool Results:**")
+            else:
+                st.write("🔍 **Tool Search Results:**")
+            st.write(message.content)
+
+    def _render_ai_message(self, message):
+        if message.tool_calls:
+            with st.chat_message("assistant"):
+                if self.usecase == "MCP Chatbot":
+                    st.write("🚀 **Calling MCP tool...**")
+                else:
+                    st.write("🔧 **Calling search tool...**")
+                for tool_call in message.tool_calls:
+                    st.write(f"Tool: {tool_call.get('name', 'Unknown')}")
+                    st.write(f"Query: {tool_call['args'].get('query', 'N/A')}")
+        else:
+            with st.chat_message("assistant"):
+                st.write(message.content)
+                
+                # Log interaction for monitoring - fail silently if monitoring unavailable
+                try:
+                    log_user_interaction(
+                        usecase=self.usecase,
+                        user_message=self.user_message,
+                        response=message.content
+                    )
+                except Exception:
+                    pass
+
+    # message type -> renderer; subclasses are resolved once, then cached
+    _RENDERERS = {
+        ToolMessage: _render_tool_message,
+        AIMessage: _render_ai_message,
+    }
+
+    @classmethod
+    def _resolve_renderer(cls, message_type):
+        renderer = None
+        for base, candidate in list(cls._RENDERERS.items()):
+            if candidate is not None and issubclass(message_type, base):
+                renderer = candidate
+                break
+        cls._RENDERERS[message_type] = renderer
+        return renderer
+
+    # usecase -> renderer, resolved with a single dict lookup per turn
+    HANDLERS = {
+        "Basic Chatbot": _display_basic,
+        "Chatbot with Tool": _display_with_tools,
+        "AI News": _display_with_tools,
+        "MCP Chatbot": _display_with_tools,
+    }
     
     def _show_safety_info(self):
         """Show safety information"""
@@ -1,12 +1,38 @@
 import streamlit as st
+import functools
+import importlib.util
 import os
 from datetime import date
 from langchain_core.messages import AIMessage, HumanMessage
 from src.langgraphagenticai.ui.uiconfigfile import Config
 
+# Optional sidebar integrations: whether their packages are installed is
+# checked once without importing them; the modules load on first use
+_HAVE_GUARDS = importlib.util.find_spec("guardrails") is not None
+_HAVE_LANGFUSE = importlib.util.find_spec("langfuse") is not None
+
+
+@functools.cache
+def _get_validation_service():
+    from src.langgraphagenticai.guardrail.validation_service import validation_service
+    return validation_service
+
+
+@functools.cache
+def _get_langfuse_status():
+    from src.langgraphagenticai.monitoring.langfuse_integration import get_langfuse_manager, is_langfuse_ready
+    return get_langfuse_manager, is_langfuse_ready
+
+
+@st.cache_resource(show_spinner=False)
+def _get_config() -> Config:
+    """Read the UI config file once per process instead of on every rerun"""
+    return Config()
+
+
 class LoadStreamlitUI:
     def __init__(self):
-        self.config = Config()
+        self.config = _get_config()
         self.user_controls = {}
 
     def initialize_session(self):
@@ -43,30 +69,35 @@ class LoadStreamlitUI:
             st.subheader("🛡️ Safety & Monitoring")
             
             # Guardrails status
-            try:
-                from src.langgraphagenticai.guardrail.validation_service import validation_service
-                if validation_service.config.is_enabled():
-                    st.success("🛡️ Guardrails: ON")
-                    stats = validation_service.get_validation_stats()
-                    if stats.get("total_guards", 0) > 0:
-                        st.caption(f"Active guards: {stats['total_guards']}")
-                else:
-                    st.info("🛡️ Guardrails: OFF")
-            except Exception:
-                pass
+            if _HAVE_GUARDS:
+                try:
+                    validation_service = _get_validation_service()
+                    if validation_service.config.is_enabled():
+                        st.success("🛡️ Guardrails: ON")
+                        stats = validation_service.get_validation_stats()
+                        if stats.get("total_guards", 0) > 0:
+                            st.caption(f"Active guards: {stats['total_guards']}")
+                    else:
+                        st.info("🛡️ Guardrails: OFF")
+                except Exception:
+                    pass
             
             # Langfuse monitoring status - fail silently if monitoring unavailable
-            try:
-                from src.langgraphagenticai.monitoring.langfuse_integration import langfuse_manager
-                if langfuse_manager.is_enabled():
-                    st.success("📊 Monitoring: ON")
-                    dashboard_url = langfuse_manager.get_dashboard_url()
-                    st.markdown(f"[📈 View Dashboard]({dashboard_url})")
-                else:
-                    st.info("📊 Monitoring: OFF")
-            except Exception:
-                # If monitoring status can't be determined, don't show anything
-                pass
+            if _HAVE_LANGFUSE:
+                try:
+                    get_langfuse_manager, is_langfuse_ready = _get_langfuse_status()
+                    # Nothing to show until the background warm-up has built the client
+                    if is_langfuse_ready():
+                        langfuse_manager = get_langfuse_manager()
+                        if langfuse_manager.is_enabled():
+                            st.success("📊 Monitoring: ON")
+                            dashboard_url = langfuse_manager.get_dashboard_url()
+                            st.markdown(f"[📈 View Dashboard]({dashboard_url})")
+                        else:
+                            st.info("📊 Monitoring: OFF")
+                except Exception:
+                    # If monitoring status can't be determined, don't show anything
+                    pass
             
             st.divider()
             
@@ -135,7 +166,7 @@ class LoadStreamlitUI:
                 if mcp_config_text:
                     st.session_state.mcp_config_text = mcp_config_text
                     
-                    # Validate config
+                    # Validate config (cached per text, so unchanged reruns skip parsing)
                     from src.langgraphagenticai.tools.mcp_tools import validate_mcp_config
                     validated_config = validate_mcp_config(mcp_config_text)
                     
@@ -5,15 +5,21 @@ class Config:
     def __init__(self, config_file="./src/langgraphagenticai/ui/uiconfigfile.ini"):
         self.config=ConfigParser()
         self.config.read(config_file)
+        # Parsed once per Config; the ini file only changes on redeploy
+        defaults = self.config["DEFAULT"]
+        self._llm_options = defaults.get("LLM_OPTIONS").split(", ")
+        self._usecase_options = defaults.get("USECASE_OPTIONS").split(", ")
+        self._groq_model_options = defaults.get("GROQ_MODEL_OPTIONS").split(", ")
+        self._page_title = defaults.get("PAGE_TITLE")
 
     def get_llm_options(self):
-        return self.config["DEFAULT"].get("LLM_OPTIONS").split(", ")
+        return self._llm_options
 
     def get_usecase_options(self):
-        return self.config["DEFAULT"].get("USECASE_OPTIONS").split(", ")
+        return self._usecase_options
 
     def get_groq_model_options(self):
-        return self.config["DEFAULT"].get("GROQ_MODEL_OPTIONS").split(", ")
+        return self._groq_model_options
 
     def get_page_title(self):
-        return self.config["DEFAULT"].get("PAGE_TITLE")
\ No newline at end of file
+        return self._page_title
\ No newline at end of file
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+llm_wrapper = pytest.importorskip("src.langgraphagenticai.guardrail.llm_wrapper")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.langgraphagenticai.guardrail import response_cache
+
+
+@pytest.fixture
+def passing_validation(monkeypatch):
+    service = llm_wrapper.validation_service
+    monkeypatch.setattr(service.config, "is_enabled", lambda: True)
+    monkeypatch.setattr(service, "validate_user_input", lambda text: (True, text, None))
+    monkeypatch.setattr(service, "validate_llm_output", lambda text, usecase: (True, text, None))
+    monkeypatch.setattr(response_cache, "_get_embedder", lambda: None)
+    monkeypatch.setenv("RESPONSE_CACHE_ENABLED", "true")
+
+
+def test_create_guardrails_llm_wraps_chat_model(passing_validation):
+    llm = llm_wrapper.create_guardrails_llm(FakeListChatModel(responses=["ok"]), "test-wrap")
+
+    assert isinstance(llm, llm_wrapper.GuardrailsLLMWrapper)
+    assert llm.invoke("hello").content == "ok"
+
+
+def test_repeated_prompt_is_served_from_cache(passing_validation):
+    llm = llm_wrapper.create_guardrails_llm(
+        FakeListChatModel(responses=["first answer", "second answer"]), "test-cache"
+    )
+
+    assert llm.invoke("same question").content == "first answer"
+    assert llm.invoke("same question").content == "first answer"
@@ -0,0 +1,65 @@
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("mcp.server.fastmcp")
+
+from src.langgraphagenticai.tools.mcp_session_pool import MCPSessionPool
+
+ECHO_SERVER = '''
+from mcp.server.fastmcp import FastMCP
+
+server = FastMCP("echo")
+
+
+@server.tool()
+def echo(query: str) -> str:
+    return "echo: " + query
+
+
+server.run()
+'''
+
+
+@pytest.fixture
+def echo_server(tmp_path):
+    script = tmp_path / "echo_server.py"
+    script.write_text(ECHO_SERVER)
+    return [sys.executable, str(script)]
+
+
+def test_tools_call_round_trip_reuses_session(echo_server):
+    pool = MCPSessionPool()
+    key = tuple(echo_server)
+    try:
+        session = pool.acquire(key, echo_server, env=None)
+        pid = session.proc.pid
+        result = session.call("tools/call", {"name": "echo", "arguments": {"query": "hi"}}, timeout=30)
+        assert result["content"][0]["text"] == "echo: hi"
+        pool.release(session)
+
+        session = pool.acquire(key, echo_server, env=None)
+        assert session.proc.pid == pid
+        start = time.monotonic()
+        result = session.call("tools/call", {"name": "echo", "arguments": {"query": "again"}}, timeout=30)
+        assert time.monotonic() - start < 1
+        assert result["content"][0]["text"] == "echo: again"
+        pool.release(session)
+    finally:
+        pool.close_all()
+
+
+def test_mcp_tool_runs_against_server(echo_server):
+    pytest.importorskip("langchain")
+    pytest.importorskip("streamlit")
+    from src.langgraphagenticai.tools.mcp_tools import MCPTool
+
+    tool = MCPTool(
+        name="mcp_echo",
+        description="echo",
+        mcp_command=echo_server[0],
+        mcp_args=echo_server[1:],
+        mcp_tool_name="echo",
+    )
+    assert tool._run("hello") == "echo: hello"